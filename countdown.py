@@ -0,0 +1,35 @@
+# ===============================
+# ТАЙМЕР ХОДУ В БРАУЗЕРІ
+# ===============================
+# Раніше таймер перемальовувався через time.sleep(0.1) + st.rerun(),
+# тобто весь скрипт ганявся ~10 разів на секунду на кожного гравця.
+# Тепер цифри тікають у браузері, а сервер дізнається лише, коли час вийшов.
+
+import os
+import time
+
+import streamlit.components.v1 as components
+
+
+# Статичний фронтенд компонента (простий HTML без збірки)
+_countdown = components.declare_component(
+    "countdown",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "countdown")
+)
+
+
+def countdown(t_end, template="⏱ Залишилось: {sec} сек", key=None):
+    # t_end — момент кінця ходу (time.time()), він же ідентифікатор ходу.
+    # Передаємо залишок, а не сам t_end, щоб не залежати від годинника браузера.
+    # Повертає True, коли час вийшов
+    remaining = max(0.0, t_end - time.time())
+
+    expired_turn = _countdown(
+        remaining=remaining,
+        turn=t_end,
+        template=template,
+        key=key,
+        default=None
+    )
+
+    return remaining <= 0 or expired_turn == t_end
@@ -0,0 +1,40 @@
+# ===============================
+# ПІДКЛЮЧЕННЯ ДО FIRESTORE ДЛЯ КОНСОЛЬНИХ УТИЛІТ
+# ===============================
+# Сам застосунок бере ключ із st.secrets (див. get_db() у головному скрипті),
+# а утиліти типу room_sweeper.py запускаються без Streamlit:
+# або проти локального емулятора, або з JSON-ключем сервісного акаунта.
+
+import json
+import os
+
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import firestore
+from google.oauth2 import service_account
+
+
+def add_db_args(parser):
+    # Спільні прапорці для всіх утиліт
+    parser.add_argument("--emulator", metavar="HOST:PORT",
+                        default=os.environ.get("FIRESTORE_EMULATOR_HOST"),
+                        help="адреса Firestore-емулятора (або змінна FIRESTORE_EMULATOR_HOST)")
+    parser.add_argument("--project", default="demo-alias",
+                        help="ID проєкту (для емулятора підійде будь-який)")
+    parser.add_argument("--key", metavar="KEY.json",
+                        help="JSON-ключ сервісного акаунта (для справжньої бази)")
+
+
+def connect(args):
+    # Клієнт Firestore за прапорцями з add_db_args()
+    if args.emulator:
+        # Клієнт сам піде в емулятор, якщо змінна оточення виставлена
+        os.environ["FIRESTORE_EMULATOR_HOST"] = args.emulator
+        return firestore.Client(project=args.project, credentials=AnonymousCredentials())
+
+    if not args.key:
+        raise SystemExit("Вкажи --emulator HOST:PORT або --key KEY.json")
+
+    with open(args.key, encoding="utf-8") as f:
+        key_dict = json.load(f)
+    creds = service_account.Credentials.from_service_account_info(key_dict)
+    return firestore.Client(credentials=creds, project=key_dict.get("project_id"))
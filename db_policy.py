@@ -0,0 +1,136 @@
+# ===============================
+# ДЕДЛАЙНИ, ПОВТОРИ І ЗАПОБІЖНИК ДЛЯ FIRESTORE
+# ===============================
+# Без цього один повільний запит тримав rerun скільки завгодно (стандартні
+# повтори клієнта тягнуться до хвилини), а одна помилка мережі валила екран.
+# Тут ми, як і op_counter.py, обгортаємо низькорівневий API-клієнт:
+#   * кожен виклик має дедлайн DEADLINE_SEC;
+#   * читання (get, get_all, запити) — ідемпотентні: до RETRY_ATTEMPTS повторів
+#     з експоненційною паузою і випадковим розкидом (щоб сесії не били в базу хором);
+#   * запис (commit) не повторюємо: Increment / ArrayUnion двічі — це вже інші дані;
+#   * запобіжник: після BREAKER_FAILURES збоїв поспіль база вважається лежачою,
+#     і BREAKER_RESET_SEC секунд запити навіть не відправляються — одразу CircuitOpen.
+#     Потім пропускаємо один пробний запит: вдався — працюємо далі, ні — чекаємо знову.
+# Слухачі on_snapshot сюди не потрапляють — вони самі перепідключаються.
+
+import random
+import threading
+import time
+
+from google.api_core.exceptions import (
+    DeadlineExceeded, InternalServerError, ResourceExhausted, ServiceUnavailable)
+
+
+# Скільки секунд чекаємо на один виклик
+DEADLINE_SEC = 5
+
+# Скільки разів повторюємо читання і з якими паузами (сек)
+RETRY_ATTEMPTS = 3
+RETRY_INITIAL_SEC = 0.2
+RETRY_MAX_SEC = 2
+
+# Скільки збоїв поспіль розмикають запобіжник і на скільки секунд
+BREAKER_FAILURES = 5
+BREAKER_RESET_SEC = 20
+
+# Тимчасові збої: їх є сенс повторити, і саме вони рахуються запобіжником
+TRANSIENT = (DeadlineExceeded, InternalServerError, ResourceExhausted, ServiceUnavailable)
+
+
+class CircuitOpen(ServiceUnavailable):
+    # Запобіжник розімкнений: у базу зараз навіть не ходимо
+    pass
+
+
+class CircuitBreaker:
+    # Один на процес: якщо база лежить, всі сесії дізнаються про це одразу
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET_SEC):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._failed = 0            # збоїв поспіль
+        self._opened_at = None      # коли розімкнули (None — все гаразд)
+        self._probing = False       # пробний запит уже летить
+        self._lock = threading.Lock()
+
+    def allow(self):
+        # Чи можна зараз іти в базу
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.time() - self._opened_at < self.reset_after:
+                return False
+            self._probing = True    # пропускаємо один пробний запит
+            return True
+
+    def success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._probing or self._failed >= self.failures:
+                self._opened_at = time.time()
+            self._probing = False
+
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+
+def _backoff(attempt):
+    # Пауза перед повтором: росте вдвічі, але з розкидом від 0 (full jitter)
+    return random.uniform(0, min(RETRY_MAX_SEC, RETRY_INITIAL_SEC * 2 ** attempt))
+
+
+def apply_policy(db, breaker):
+    # Підміняє методи API-клієнта бази: дедлайн + запобіжник на все, повтори — на читання
+    api = db._firestore_api
+
+    def call(method, args, kwargs, attempts, streaming):
+        # Власні дедлайн і повтори замість стандартних повторів клієнта
+        kwargs.setdefault("timeout", DEADLINE_SEC)
+        kwargs["retry"] = None
+
+        for attempt in range(attempts):
+            if not breaker.allow():
+                raise CircuitOpen("Firestore недоступний, запобіжник розімкнений")
+            try:
+                result = method(*args, **kwargs)
+                # Потокові відповіді дочитуємо тут, щоб збій посеред потоку теж можна було повторити
+                if streaming:
+                    result = list(result)
+            except TRANSIENT:
+                breaker.failure()
+                if attempt + 1 == attempts:
+                    raise
+                time.sleep(_backoff(attempt))
+            except Exception:
+                # База відповіла (NotFound, AlreadyExists, Aborted...) — отже, жива
+                breaker.success()
+                raise
+            else:
+                breaker.success()
+                return result
+
+    def wrap(name, attempts, streaming=False):
+        method = getattr(api, name)
+
+        if streaming:
+            def wrapped(*args, **kwargs):
+                yield from call(method, args, kwargs, attempts, streaming)
+        else:
+            def wrapped(*args, **kwargs):
+                return call(method, args, kwargs, attempts, streaming)
+
+        setattr(api, name, wrapped)
+
+    wrap("commit", 1)
+    wrap("begin_transaction", RETRY_ATTEMPTS)
+    wrap("rollback", RETRY_ATTEMPTS)
+    wrap("batch_get_documents", RETRY_ATTEMPTS, streaming=True)
+    wrap("run_query", RETRY_ATTEMPTS, streaming=True)
+    return breaker
@@ -0,0 +1,138 @@
+# ===============================
+# КІМНАТИ У FIRESTORE
+# ===============================
+# RoomStore поверх того, що вже є: підписка на кімнату (room_sync),
+# спільний кеш (room_cache), вільні коди (room_codes), транзакційні
+# переходи і таємні документи ходу (room_ops), heartbeat-и (presence).
+
+import contextlib
+
+from google.api_core.exceptions import GoogleAPICallError, RetryError
+from google.cloud import firestore
+
+import room_ops
+from presence import PresenceHub
+from room_cache import RoomCache
+from room_codes import RoomCodePool
+from room_store import RoomStore, StoreUnavailable
+from room_sync import RoomHub
+
+
+@contextlib.contextmanager
+def _unavailable():
+    # Помилки клієнта Firestore -> StoreUnavailable (головний скрипт не знає про google.*)
+    try:
+        yield
+    except (GoogleAPICallError, RetryError) as e:
+        raise StoreUnavailable(str(e)) from e
+    except ValueError as e:
+        # Транзакція не змогла навіть почати (begin_transaction впав) — @transactional
+        # пробує відкотити її і кидає ValueError "no transaction ID"; справжня причина — в __context__
+        cause = e.__cause__ or e.__context__
+        if isinstance(cause, (GoogleAPICallError, RetryError)):
+            raise StoreUnavailable(str(cause)) from cause
+        raise
+
+
+class FirestoreRoomStore(RoomStore):
+
+    def __init__(self, db, ops=None):
+        self.db = db
+        self.cache = RoomCache(db)
+        self.hub = RoomHub(db, cache=self.cache, ops=ops)
+        self.codes = RoomCodePool(db)
+        self.presence = PresenceHub(db)
+
+    def create_room(self, room_data):
+        # create-if-absent під вільним кодом: чужу кімнату не перезапишемо
+        with _unavailable():
+            return self.codes.allocate(room_ops.touched(room_data))
+
+    def get_room(self, room_id):
+        # Через спільний кеш: якщо вся тусовка заходить одночасно — один запит на всіх
+        with _unavailable():
+            return self.cache.get(room_id)
+
+    def get_rooms(self, room_ids):
+        with _unavailable():
+            return self.cache.get_many(room_ids)
+
+    def active_rooms(self, limit=20):
+        # Один запит на всі кімнати; заодно кладемо їх у кеш,
+        # щоб наступні get_room / get_rooms їх не перечитували
+        query = (self.db.collection("rooms")
+                 .order_by("updated_at", direction=firestore.Query.DESCENDING)
+                 .limit(limit))
+        rooms = []
+        with _unavailable():
+            for snap in query.stream():
+                data, _ = self.cache.put(snap.id, snap.to_dict())
+                rooms.append((snap.id, data))
+        return rooms
+
+    def subscribe(self, room_id):
+        return self.hub.subscribe(room_id)
+
+    def update_room(self, room_id, fields=None, scores=None, increments=None,
+                    add_players=(), remove_players=()):
+        updates = dict(fields or {})
+        for player, value in (scores or {}).items():
+            updates[room_ops.score_field(player)] = value
+        for field, amount in (increments or {}).items():
+            updates[field] = firestore.Increment(amount)
+
+        # Firestore не дозволяє два перетворення одного поля в одному update —
+        # тому, якщо є і ArrayUnion, і ArrayRemove, ArrayRemove йде окремим записом
+        extra = None
+        if add_players:
+            updates["players"] = firestore.ArrayUnion(list(add_players))
+            if remove_players:
+                extra = {"players": firestore.ArrayRemove(list(remove_players))}
+        elif remove_players:
+            updates["players"] = firestore.ArrayRemove(list(remove_players))
+
+        ref = room_ops.room_ref(self.db, room_id)
+        with _unavailable():
+            ref.update(room_ops.touched(updates))
+            if extra:
+                ref.update(room_ops.touched(extra))
+
+        # Наш запис змінив кімнату — кеш для неї вже не свіжий
+        self.cache.invalidate(room_id)
+
+    def start_turn(self, room_id, expected_version, explainer, listener, deal, t_end):
+        with _unavailable():
+            return room_ops.start_turn(self.db, room_id, expected_version, explainer, listener, deal, t_end)
+
+    def deal_more(self, room_id, explainer, deal):
+        with _unavailable():
+            return room_ops.deal_more(self.db, room_id, explainer, deal)
+
+    def load_secret(self, room_id, explainer):
+        with _unavailable():
+            return room_ops.load_secret(self.db, room_id, explainer)
+
+    def flush_results(self, room_id, player, results):
+        with _unavailable():
+            room_ops.flush_results(self.db, room_id, player, results)
+
+    def end_turn(self, room_id, expected_version):
+        with _unavailable():
+            return room_ops.end_turn(self.db, room_id, expected_version)
+
+    def heartbeat(self, room_id, player):
+        # Heartbeat — не критичний: не дійшов зараз, дійде наступний
+        try:
+            self.presence.heartbeat(room_id, player)
+        except (GoogleAPICallError, RetryError):
+            pass
+
+    def leave(self, room_id, player):
+        # Не вдалося прибрати відмітку — гравець сам стане офлайн через STALE_SEC
+        try:
+            self.presence.leave(room_id, player)
+        except (GoogleAPICallError, RetryError):
+            pass
+
+    def online(self, room_id, players):
+        return self.presence.online(room_id, players)
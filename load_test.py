@@ -0,0 +1,251 @@
+# ===============================
+# НАВАНТАЖУВАЛЬНИЙ ТЕСТ (N кімнат × M гравців)
+# ===============================
+# Без браузера і без Streamlit ганяє ту саму ігрову логіку, що й застосунок
+# (RoomStore, RoomWrites, room_state, TurnBatch), проти локального Firestore-емулятора
+# або проти MemoryRoomStore / SqliteRoomStore (--store memory / sqlite). Кожна кімната — окремий потік:
+# гравці заходять, хост стартує гру, пари по черзі пояснюють слова
+# (вгадано/пропущено із заданою швидкістю), хід закриває turn_authority.
+#
+# В кінці друкує:
+#   * читання/записи Firestore за хвилину на кімнату (запити + снапшоти підписок на кімнати);
+#   * p50/p99 затримки "дія -> зміна видна в підписці" (мс);
+#   * CPU процесу на одну сесію гравця.
+#
+# Приклад:
+#   python load_test.py --emulator localhost:8080 --rooms 20 --players 6 --minutes 2
+#   python load_test.py --store memory --rooms 200 --players 6
+# Після тесту кімнати лишаються в базі — прибрати:
+#   python room_sweeper.py --emulator localhost:8080 --idle-minutes 0
+
+import argparse
+import random
+import threading
+import time
+
+import room_state
+from db_client import add_db_args, connect
+from firestore_store import FirestoreRoomStore
+from memory_store import MemoryRoomStore
+from op_counter import OpCounter, count_ops
+from sqlite_store import SqliteRoomStore
+from room_writes import RoomWrites
+from turn_batch import BATCH_SIZE, TurnBatch
+from word_deck import draw_words
+from word_store import DEFAULT_WORDS
+
+
+# Скільки чекаємо, поки зміна долетить до підписки, перш ніж рахувати її втраченою
+VISIBLE_TIMEOUT_SEC = 10
+
+
+class Stats:
+    # Спільна статистика всіх потоків-кімнат
+
+    def __init__(self):
+        self.latencies = []         # мс від запису до появи зміни в підписці
+        self.lost = 0               # зміни, які так і не стало видно
+        self.turns = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def latency(self, ms):
+        with self._lock:
+            self.latencies.append(ms)
+
+
+def wait_visible(sub, predicate, started, stats):
+    # Чекаємо, поки підписка покаже стан, для якого predicate(data) == True
+    deadline = started + VISIBLE_TIMEOUT_SEC
+    data, version = sub.get()
+    while data is None or not predicate(data):
+        if time.perf_counter() >= deadline:
+            stats.add(lost=1)
+            return
+        sub.wait_for_change(version, timeout=deadline - time.perf_counter())
+        data, version = sub.get()
+    stats.latency((time.perf_counter() - started) * 1000)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def deal(deck):
+    return draw_words(DEFAULT_WORDS, deck, BATCH_SIZE)
+
+
+def play_turn(store, sub, room_id, names, args, stats):
+    # Один хід: хост обирає пару, пояснювач гортає слова, хід закриває turn_authority
+    data, _ = sub.get()
+    online = store.online(room_id, data["players"])
+    explainer, listener = random.sample(online if len(online) >= 2 else names, 2)
+    t_end = time.time() + args.turn_sec
+
+    started = time.perf_counter()
+    if not store.start_turn(room_id, data.get("version", 0), explainer, listener, deal, t_end):
+        return
+    wait_visible(sub, lambda d: d.get("explainer") == explainer, started, stats)
+
+    secret = store.load_secret(room_id, explainer)
+    batch = TurnBatch(t_end, secret["words"], pos=len(secret.get("log", [])))
+    rate = args.actions_per_min / 60
+
+    while True:
+        pause = random.expovariate(rate) if rate > 0 else args.turn_sec
+        time.sleep(max(0, min(pause, t_end - time.time())))
+        if time.time() >= t_end:
+            break
+
+        for name in names:
+            store.heartbeat(room_id, name)
+
+        if batch.needs_more():
+            batch.add_words(store.deal_more(room_id, explainer, deal))
+        word = batch.current()
+        if word is None:
+            continue
+
+        if batch.mark(word, guessed=random.random() < args.guess_rate):
+            results = batch.take_pending()
+            guessed = sum(1 for r in results if r["guessed"])
+            data, _ = sub.get()
+            expected = data.get("scores", {}).get(explainer, 0) + guessed
+
+            started = time.perf_counter()
+            store.flush_results(room_id, explainer, results)
+            if guessed:
+                wait_visible(sub, lambda d: d.get("scores", {}).get(explainer, 0) >= expected, started, stats)
+
+    if batch.pending:
+        store.flush_results(room_id, explainer, batch.take_pending())
+
+    # Хід закриває один гравець на кімнату — як у застосунку
+    data, _ = sub.get()
+    if room_state.turn_authority(data.get("host"), store.online(room_id, data["players"])) in names:
+        started = time.perf_counter()
+        store.end_turn(room_id, data.get("version", 0))
+        wait_visible(sub, lambda d: not d.get("explainer"), started, stats)
+    stats.add(turns=1)
+
+
+def run_room(store, args, stats, stop_at):
+    names = [f"bot{random.getrandbits(24):06x}" for _ in range(args.players)]
+    host = names[0]
+
+    room_id = store.create_room({
+        "host": host,
+        "players": [host],
+        "scores": {host: 0},
+        "state": "lobby",
+        "total_rounds": args.rounds,
+        "duration": args.turn_sec,
+        "current_round": 1,
+        "explainer": "",
+        "listener": "",
+        "version": 0
+    })
+    sub = store.subscribe(room_id)
+
+    # Гравці заходять по одному
+    for name in names[1:]:
+        data, _ = sub.get()
+        writes = RoomWrites(store, room_id, data)
+        writes.add_player(name)
+        writes.set_score(name, 0)
+
+        started = time.perf_counter()
+        writes.commit()
+        wait_visible(sub, lambda d: name in d.get("players", []), started, stats)
+
+    for name in names:
+        store.heartbeat(room_id, name)
+
+    # Хост запускає гру
+    data, _ = sub.get()
+    writes = RoomWrites(store, room_id, data)
+    for field, value in room_state.start_game(data).items():
+        writes.set(field, value)
+    writes.increment("version")
+    started = time.perf_counter()
+    writes.commit()
+    wait_visible(sub, lambda d: room_state.phase(d) != room_state.LOBBY, started, stats)
+
+    while time.time() < stop_at:
+        data, _ = sub.get()
+        if room_state.phase(data) == room_state.FINISHED:
+            break
+        play_turn(store, sub, room_id, names, args, stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Навантажувальний тест: N кімнат × M гравців проти Firestore-емулятора")
+    add_db_args(parser)
+    parser.add_argument("--store", choices=["firestore", "memory", "sqlite"], default="firestore",
+                        help="де живуть кімнати: Firestore-емулятор, памʼять процесу або SQLite-файл")
+    parser.add_argument("--sqlite-path", default="load_test.db", help="файл бази для --store sqlite")
+    parser.add_argument("--rooms", type=int, default=10, help="скільки кімнат одночасно")
+    parser.add_argument("--players", type=int, default=5, help="гравців у кімнаті (мінімум 2)")
+    parser.add_argument("--minutes", type=float, default=1, help="скільки хвилин ганяти")
+    parser.add_argument("--rounds", type=int, default=100, help="раундів у грі (кімната грає, поки не вийде час)")
+    parser.add_argument("--turn-sec", type=int, default=20, help="тривалість ходу")
+    parser.add_argument("--actions-per-min", type=float, default=20,
+                        help="скільки слів за хвилину гортає пояснювач")
+    parser.add_argument("--guess-rate", type=float, default=0.7, help="частка вгаданих слів")
+    args = parser.parse_args()
+
+    if args.store == "firestore" and not args.emulator:
+        raise SystemExit("Навантажувальний тест ганяємо тільки проти емулятора: вкажи --emulator HOST:PORT")
+    if args.players < 2:
+        raise SystemExit("У кімнаті потрібно мінімум 2 гравці")
+
+    ops = OpCounter()
+    if args.store == "firestore":
+        db = connect(args)
+        count_ops(db, ops)
+        store = FirestoreRoomStore(db, ops=ops)
+    elif args.store == "sqlite":
+        store = SqliteRoomStore(args.sqlite_path)
+    else:
+        store = MemoryRoomStore()
+    stats = Stats()
+
+    def room_thread():
+        try:
+            run_room(store, args, stats, stop_at)
+        except Exception as e:
+            stats.add(errors=1)
+            print(f"[LOAD] помилка в кімнаті: {e!r}")
+
+    started, cpu_started = time.time(), time.process_time()
+    stop_at = started + args.minutes * 60
+    threads = [threading.Thread(target=room_thread, daemon=True) for _ in range(args.rooms)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    minutes = (time.time() - started) / 60
+    cpu = time.process_time() - cpu_started
+    reads, writes = ops.snapshot()
+    sessions = args.rooms * args.players
+
+    print(f"[LOAD] {args.rooms} кімнат × {args.players} гравців, {minutes:.1f} хв, ходів: {stats.turns}, помилок: {stats.errors}")
+    if args.store == "firestore":
+        print(f"[LOAD] на кімнату за хвилину: читань {reads / minutes / args.rooms:.1f}, "
+              f"записів {writes / minutes / args.rooms:.1f}")
+    print(f"[LOAD] дія -> видно в підписці: p50 {percentile(stats.latencies, 50):.1f} мс, "
+          f"p99 {percentile(stats.latencies, 99):.1f} мс (замірів {len(stats.latencies)}, не дочекались {stats.lost})")
+    print(f"[LOAD] CPU: {cpu:.1f} с на процес, {cpu / sessions / minutes * 1000:.1f} мс/хв на сесію")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# ===============================
+# КІМНАТИ В ПАМʼЯТІ ПРОЦЕСУ
+# ===============================
+# Для одного сервера без Firestore: якщо get_db() не зміг підключитись,
+# Discord-режим працює на цьому сховищі. Всі гравці мають заходити на той
+# самий процес сервера; після перезапуску кімнати зникають.
+#
+# Один замок-Condition на все сховище: кожна зміна кімнати будить сесії,
+# які чекають у wait_for_change(). Переходи — ті самі room_state.*,
+# тільки замість транзакції — замок.
+
+import copy
+import threading
+import time
+
+import room_state
+from presence import STALE_SEC
+from room_codes import MAX_ATTEMPTS, generate_room_code
+from room_store import RoomStore
+
+
+# Кімнати без жодного запису довше за стільки секунд видаляємо
+IDLE_ROOM_SEC = 2 * 60 * 60
+
+
+class _Room:
+    def __init__(self, data):
+        self.data = data            # документ кімнати (dict), як у Firestore
+        self.changes = 0            # лічильник змін — для wait_for_change()
+        self.secrets = {}           # пояснювач -> {"explainer", "t_end", "words", "log"}
+        self.deck = None            # колода кімнати
+        self.seen = {}              # гравець -> коли востаннє подавав ознаки життя
+
+
+class MemorySubscription:
+
+    def __init__(self, store, room_id):
+        self.store = store
+        self.room_id = room_id
+
+    def get(self, timeout=5):
+        with self.store._cond:
+            room = self.store._rooms.get(self.room_id)
+            if room is None:
+                return None, 0
+            return copy.deepcopy(room.data), room.changes
+
+    def wait_for_change(self, version, timeout):
+        with self.store._cond:
+            return self.store._cond.wait_for(lambda: self.store._changes(self.room_id) != version, timeout)
+
+
+class MemoryRoomStore(RoomStore):
+
+    def __init__(self):
+        self._rooms = {}            # room_id -> _Room
+        self._cond = threading.Condition()
+
+    def _changes(self, room_id):
+        # Викликати під self._cond
+        room = self._rooms.get(room_id)
+        return room.changes if room else 0
+
+    def _touch(self, room):
+        # Викликати під self._cond: кімната змінилась — будимо всіх, хто чекає
+        room.data["updated_at"] = time.time()
+        room.changes += 1
+        self._cond.notify_all()
+
+    def _drop_idle(self):
+        # Викликати під self._cond
+        now = time.time()
+        for room_id, room in list(self._rooms.items()):
+            if now - room.data.get("updated_at", now) > IDLE_ROOM_SEC:
+                del self._rooms[room_id]
+
+    def create_room(self, room_data):
+        with self._cond:
+            self._drop_idle()
+            for _ in range(MAX_ATTEMPTS):
+                code = generate_room_code()
+                if code not in self._rooms:
+                    room = self._rooms[code] = _Room(copy.deepcopy(room_data))
+                    self._touch(room)
+                    return code
+        raise RuntimeError("Не вдалося підібрати вільний код кімнати")
+
+    def get_room(self, room_id):
+        return MemorySubscription(self, room_id).get()
+
+    def get_rooms(self, room_ids):
+        # Під одним замком — усі кімнати з одного моменту
+        with self._cond:
+            return {room_id: MemorySubscription(self, room_id).get() for room_id in room_ids}
+
+    def active_rooms(self, limit=20):
+        with self._cond:
+            rooms = sorted(self._rooms.items(), key=lambda item: item[1].data.get("updated_at", 0), reverse=True)
+            return [(room_id, copy.deepcopy(room.data)) for room_id, room in rooms[:limit]]
+
+    def subscribe(self, room_id):
+        return MemorySubscription(self, room_id)
+
+    def update_room(self, room_id, fields=None, scores=None, increments=None,
+                    add_players=(), remove_players=()):
+        with self._cond:
+            room = self._rooms.get(room_id)
+            if room is None:
+                return
+            data = room.data
+            data.update(copy.deepcopy(fields or {}))
+            data.setdefault("scores", {}).update(scores or {})
+            for field, amount in (increments or {}).items():
+                data[field] = data.get(field, 0) + amount
+            players = data.setdefault("players", [])
+            players.extend(p for p in add_players if p not in players)
+            data["players"] = [p for p in players if p not in remove_players]
+            self._touch(room)
+
+    def _transition(self, room_id, expected_version, make_updates):
+        # Те саме, що room_ops.transition, тільки під замком замість транзакції
+        with self._cond:
+            room = self._rooms.get(room_id)
+            if room is None or room.data.get("version", 0) != expected_version:
+                return False
+            updates = make_updates(room)
+            if updates is None:
+                return False
+            room.data.update(updates)
+            room.data["version"] = expected_version + 1
+            self._touch(room)
+            return True
+
+    def start_turn(self, room_id, expected_version, explainer, listener, deal, t_end):
+        def make_updates(room):
+            updates = room_state.start_turn(room.data, explainer, listener, t_end)
+            if updates is not None:
+                words, room.deck = deal(room.deck)
+                room.secrets[explainer] = {"explainer": explainer, "t_end": t_end, "words": words, "log": []}
+            return updates
+
+        return self._transition(room_id, expected_version, make_updates)
+
+    def end_turn(self, room_id, expected_version):
+        return self._transition(room_id, expected_version, lambda room: room_state.end_turn(room.data))
+
+    def deal_more(self, room_id, explainer, deal):
+        with self._cond:
+            room = self._rooms.get(room_id)
+            secret = room.secrets.get(explainer) if room else None
+            if secret is None:
+                return []
+            words, room.deck = deal(room.deck)
+            words = [w for w in words if w not in secret["words"]]
+            secret["words"].extend(words)
+            return words
+
+    def load_secret(self, room_id, explainer):
+        with self._cond:
+            room = self._rooms.get(room_id)
+            secret = room.secrets.get(explainer) if room else None
+            return copy.deepcopy(secret)
+
+    def flush_results(self, room_id, player, results):
+        with self._cond:
+            room = self._rooms.get(room_id)
+            if room is None:
+                return
+            secret = room.secrets.get(player)
+            if secret is not None:
+                secret["log"].extend(results)
+
+            # Самі пропуски кімнату не чіпають (як і у Firestore)
+            guessed = sum(1 for r in results if r["guessed"])
+            if guessed:
+                scores = room.data.setdefault("scores", {})
+                scores[player] = scores.get(player, 0) + guessed
+                self._touch(room)
+
+    def heartbeat(self, room_id, player):
+        with self._cond:
+            room = self._rooms.get(room_id)
+            if room is not None:
+                room.seen[player] = time.time()
+
+    def leave(self, room_id, player):
+        with self._cond:
+            room = self._rooms.get(room_id)
+            if room is not None:
+                room.seen.pop(player, None)
+
+    def online(self, room_id, players):
+        now = time.time()
+        with self._cond:
+            room = self._rooms.get(room_id)
+            seen = dict(room.seen) if room else {}
+        return [p for p in players if now - seen.get(p, 0) < STALE_SEC]
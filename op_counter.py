@@ -0,0 +1,127 @@
+# ===============================
+# ЛІЧИЛЬНИК ОПЕРАЦІЙ FIRESTORE
+# ===============================
+# Firestore рахує гроші і квоту за кожен прочитаний і записаний документ,
+# але клієнт сам ніде цього не показує. Тут ми обгортаємо низькорівневий
+# API-клієнт (той, через який ходять усі get/stream/update/transaction)
+# і рахуємо документи:
+#   * записи — кожен write у commit (update, set, create, delete, batch, транзакція);
+#   * читання — кожен знайдений/відсутній документ у get і get_all,
+#     кожен документ запиту (порожній запит — теж 1 читання).
+# Снапшоти on_snapshot сюди не потрапляють — їх рахує той, хто слухає.
+#
+# Кожна операція ще й записується на сесію і кімнату, які потік виставив
+# через set_context() (Streamlit ганяє кожну сесію у своєму потоці).
+# Сесії і кімнати приходять і йдуть, тому:
+#   * take_interval() віддає і обнуляє лічильники за інтервал — у файл пишемо лише їх;
+#   * prune() викидає тих, хто IDLE_SEC нічого не читав і не писав.
+
+import threading
+import time
+
+
+# Через скільки секунд тиші сесія/кімната зникає з лічильників
+IDLE_SEC = 30 * 60
+
+
+# Чия зараз операція: сесія і кімната поточного потоку
+_context = threading.local()
+
+
+def set_context(session=None, room=None):
+    _context.session = session
+    _context.room = room
+
+
+class OpCounter:
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.by_session = {}        # сесія -> [reads, writes, остання операція]
+        self.by_room = {}           # кімната -> [reads, writes, остання операція]
+        self._interval = ({}, {})   # те саме з останнього take_interval(), без часу
+        self._lock = threading.Lock()
+
+    def add(self, reads=0, writes=0, room=None):
+        session = getattr(_context, "session", None)
+        room = room or getattr(_context, "room", None)
+        now = time.time()
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+            for key, totals, interval in ((session, self.by_session, self._interval[0]),
+                                          (room, self.by_room, self._interval[1])):
+                if key:
+                    counts = totals.setdefault(key, [0, 0, now])
+                    counts[0] += reads
+                    counts[1] += writes
+                    counts[2] = now
+                    delta = interval.setdefault(key, [0, 0])
+                    delta[0] += reads
+                    delta[1] += writes
+
+    def snapshot(self):
+        # (reads, writes) на цей момент
+        with self._lock:
+            return self.reads, self.writes
+
+    def take_interval(self):
+        # Хто скільки зробив з минулого виклику: ({сесія: [reads, writes]}, {кімната: [reads, writes]}).
+        # Лічильники інтервалу після цього починаються з нуля
+        with self._lock:
+            interval, self._interval = self._interval, ({}, {})
+            return interval
+
+    def prune(self, idle_sec=IDLE_SEC):
+        # Забуваємо сесії і кімнати, які давно мовчать
+        cutoff = time.time() - idle_sec
+        with self._lock:
+            for totals in (self.by_session, self.by_room):
+                for key in [k for k, v in totals.items() if v[2] < cutoff]:
+                    del totals[key]
+
+    def for_session(self, session):
+        with self._lock:
+            return tuple(self.by_session.get(session, (0, 0))[:2])
+
+    def for_room(self, room):
+        with self._lock:
+            return tuple(self.by_room.get(room, (0, 0))[:2])
+
+
+def count_ops(db, counter):
+    # Підміняє методи API-клієнта бази так, щоб кожна операція потрапляла в counter
+    api = db._firestore_api
+
+    commit = api.commit
+    batch_get_documents = api.batch_get_documents
+    run_query = api.run_query
+
+    def counted_commit(*args, **kwargs):
+        # Рахуємо лише commit, який пройшов: впав (таймаут, запобіжник) — записів не було
+        request = kwargs.get("request") or args[0]
+        response = commit(*args, **kwargs)
+        counter.add(writes=len(request["writes"]))
+        return response
+
+    def counted_batch_get_documents(*args, **kwargs):
+        for response in batch_get_documents(*args, **kwargs):
+            if "found" in response or "missing" in response:
+                counter.add(reads=1)
+            yield response
+
+    def counted_run_query(*args, **kwargs):
+        found = 0
+        for response in run_query(*args, **kwargs):
+            if "document" in response:
+                found += 1
+                counter.add(reads=1)
+            yield response
+        if not found:
+            counter.add(reads=1)    # порожній запит теж коштує одне читання
+
+    api.commit = counted_commit
+    api.batch_get_documents = counted_batch_get_documents
+    api.run_query = counted_run_query
+    return counter
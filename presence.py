@@ -0,0 +1,124 @@
+# ===============================
+# ХТО ЩЕ ОНЛАЙН (heartbeat)
+# ===============================
+# Якщо вкладку закрили, гравець лишався в players назавжди, і хост міг
+# випадково вибрати "привида" пояснювачем — хід згорав, ніхто не грав.
+#
+# Тепер кожна сесія раз на HEARTBEAT_SEC пише відмітку в
+# rooms/<код>/presence/<хеш ніка>. Саме в підколекцію, а не в документ кімнати,
+# щоб heartbeat не будив усіх, хто підписаний на кімнату.
+# Відмітки читаємо одним on_snapshot-слухачем на кімнату на процес.
+
+import datetime
+import hashlib
+import threading
+import time
+
+
+# Як часто сесія підтверджує, що вона жива
+HEARTBEAT_SEC = 15
+
+# Через скільки секунд без heartbeat гравець вважається офлайн
+STALE_SEC = 45
+
+# Скільки секунд слухач живе без жодного звернення
+IDLE_UNSUBSCRIBE_SEC = 600
+
+
+class RoomPresence:
+    # Останні відмітки гравців однієї кімнати: нік -> datetime
+
+    def __init__(self, room_ref):
+        self.collection = room_ref.collection("presence")
+        self.last_seen = {}
+        self.last_used = time.time()
+        self._lock = threading.Lock()
+        self._watch = self.collection.on_snapshot(self._on_snapshot)
+
+    def _on_snapshot(self, docs, changes, read_time):
+        seen = {}
+        for d in docs:
+            data = d.to_dict()
+            # last_seen = None, поки сервер не проставив SERVER_TIMESTAMP
+            if data.get("last_seen"):
+                seen[data["player"]] = data["last_seen"]
+        with self._lock:
+            self.last_seen = seen
+
+    def is_online(self, player):
+        self.last_used = time.time()
+        with self._lock:
+            ts = self.last_seen.get(player)
+        if ts is None:
+            return False
+        return (datetime.datetime.now(datetime.timezone.utc) - ts).total_seconds() < STALE_SEC
+
+    def close(self):
+        try:
+            self._watch.unsubscribe()
+        except Exception:
+            pass
+
+
+class PresenceHub:
+    # Один на процес: слухачі присутності по кімнатах + тротлінг heartbeat-ів
+
+    def __init__(self, db):
+        self.db = db
+        self._rooms = {}            # room_id -> RoomPresence
+        self._beats = {}            # (room_id, нік) -> коли востаннє писали heartbeat
+        self._lock = threading.Lock()
+
+    def room(self, room_id):
+        with self._lock:
+            self._drop_idle()
+            presence = self._rooms.get(room_id)
+            if presence is None:
+                presence = RoomPresence(self.db.collection("rooms").document(room_id))
+                self._rooms[room_id] = presence
+            presence.last_used = time.time()
+            return presence
+
+    def heartbeat(self, room_id, player):
+        # Пишемо не на кожен rerun, а раз на HEARTBEAT_SEC
+        now = time.time()
+        with self._lock:
+            if now - self._beats.get((room_id, player), 0) < HEARTBEAT_SEC:
+                return
+            self._beats[(room_id, player)] = now
+
+        # Імпорт тут, а не зверху: константи цього модуля беруть і сховища без Firestore
+        # (memory_store, sqlite_store), і їм не потрібні бібліотеки google
+        from google.cloud import firestore
+        self._doc(room_id, player).set({"player": player, "last_seen": firestore.SERVER_TIMESTAMP})
+
+    def leave(self, room_id, player):
+        # Гравець сам вийшов — прибираємо відмітку одразу
+        with self._lock:
+            self._beats.pop((room_id, player), None)
+        self._doc(room_id, player).delete()
+
+    def online(self, room_id, players):
+        # Тільки ті гравці, що зараз онлайн (порядок зберігається).
+        # Свіжі heartbeat-и з цього ж сервера рахуємо одразу, не чекаючи снапшота
+        presence = self.room(room_id)
+        now = time.time()
+        with self._lock:
+            local = {p for (r, p), ts in self._beats.items() if r == room_id and now - ts < STALE_SEC}
+        return [p for p in players if p in local or presence.is_online(p)]
+
+    def _doc(self, room_id, player):
+        # ID документа — хеш ніка (в ніку можуть бути "/" та інші заборонені для ID символи)
+        doc_id = hashlib.sha1(player.encode("utf-8")).hexdigest()
+        return self.db.collection("rooms").document(room_id).collection("presence").document(doc_id)
+
+    def _drop_idle(self):
+        # Викликати під self._lock
+        now = time.time()
+        for room_id, presence in list(self._rooms.items()):
+            if now - presence.last_used > IDLE_UNSUBSCRIBE_SEC:
+                presence.close()
+                del self._rooms[room_id]
+        for key, ts in list(self._beats.items()):
+            if now - ts > IDLE_UNSUBSCRIBE_SEC:
+                del self._beats[key]
@@ -0,0 +1,100 @@
+# ===============================
+# ЗАМІРИ RERUN-ІВ
+# ===============================
+# Куди йде час одного rerun (CSS, підключення, словник, сам екран, очікування змін)
+# і скільки читань/записів Firestore робить кожна сесія і кожна кімната.
+#
+#   * Metrics — одна на процес: сумує фази по game_state і тримає OpCounter;
+#     раз на FLUSH_EVERY_SEC дописує зведення одним рядком JSON у metrics.jsonl
+#     (читання/записи сесій і кімнат — лише за цей інтервал, а хто давно мовчить — забувається).
+#   * RerunTimer — один на сесію: ділить rerun на фази.
+#     st.rerun() обриває скрипт посеред фази, тому незакриту фазу
+#     закриває вже наступний rerun (або finish() у кінці скрипта).
+
+import json
+import threading
+import time
+
+from op_counter import OpCounter
+
+
+# Як часто (сек) дописувати зведення у файл
+FLUSH_EVERY_SEC = 60
+
+
+class Metrics:
+
+    def __init__(self, path="metrics.jsonl"):
+        self.path = path
+        self.ops = OpCounter()
+        self._phases = {}           # game_state -> фаза -> [кількість, сума мс, макс мс]
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, game_state, phase, ms):
+        with self._lock:
+            stats = self._phases.setdefault(game_state, {}).setdefault(phase, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+
+    def phases(self, game_state):
+        # {фаза: {"count", "avg_ms", "max_ms"}} для одного екрана
+        with self._lock:
+            return {phase: {"count": n, "avg_ms": round(total / n, 2), "max_ms": round(top, 2)}
+                    for phase, (n, total, top) in self._phases.get(game_state, {}).items()}
+
+    def summary(self):
+        # Фази і загальні reads/writes — з початку процесу, сесії і кімнати — за інтервал
+        with self._lock:
+            game_states = list(self._phases)
+        reads, writes = self.ops.snapshot()
+        sessions, rooms = self.ops.take_interval()
+        self.ops.prune()
+        return {
+            "ts": time.time(),
+            "phases": {gs: self.phases(gs) for gs in game_states},
+            "reads": reads,
+            "writes": writes,
+            "sessions": sessions,
+            "rooms": rooms
+        }
+
+    def maybe_flush(self):
+        # Не частіше, ніж раз на FLUSH_EVERY_SEC (з будь-якої сесії)
+        with self._lock:
+            if time.time() - self._last_flush < FLUSH_EVERY_SEC:
+                return
+            self._last_flush = time.time()
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.summary(), ensure_ascii=False) + "\n")
+        except OSError:
+            pass        # заміри не повинні ламати гру
+
+
+class RerunTimer:
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.game_state = None
+        self._phase = None
+        self._started = 0
+
+    def start(self, game_state, phase):
+        # Початок rerun: закриваємо те, що лишилось від попереднього
+        self.finish()
+        self.game_state = game_state
+        self.phase(phase)
+
+    def phase(self, name):
+        # Закриваємо поточну фазу і починаємо наступну
+        self.finish()
+        self._phase = name
+        self._started = time.perf_counter()
+
+    def finish(self):
+        if self._phase is not None:
+            ms = (time.perf_counter() - self._started) * 1000
+            self.metrics.record(self.game_state, self._phase, ms)
+            self._phase = None
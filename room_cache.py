@@ -0,0 +1,134 @@
+# ===============================
+# СПІЛЬНИЙ КЕШ КІМНАТ (на весь процес сервера)
+# ===============================
+# Коли весь дискорд-колл заходить в одну кімнату, кожна сесія робила свій
+# db.collection("rooms").document(...).get() і отримувала те саме.
+# Тут один кеш на процес: свіжі дані віддаємо з памʼяті, а якщо кілька сесій
+# одночасно просять ту саму кімнату — в базу йде лише ОДИН запит.
+
+import copy
+import threading
+import time
+
+
+# Скільки секунд дані вважаються свіжими
+FRESH_TTL_SEC = 2.0
+
+# Через скільки секунд без звернень запис викидаємо з памʼяті
+EVICT_AFTER_SEC = 300
+
+
+class _Entry:
+    def __init__(self, data, version):
+        self.data = data                # dict кімнати або None (кімнати нема)
+        self.version = version          # росте, коли дані змінились
+        self.fetched_at = time.time()   # коли дані востаннє підтвердили
+        self.last_used = time.time()    # коли їх востаннє читали
+
+
+class RoomCache:
+
+    def __init__(self, db, ttl=FRESH_TTL_SEC, evict_after=EVICT_AFTER_SEC):
+        self.db = db
+        self.ttl = ttl
+        self.evict_after = evict_after
+        self._entries = {}      # room_id -> _Entry
+        self._inflight = {}     # room_id -> threading.Event (запит уже летить)
+        self._lock = threading.Lock()
+
+    def get(self, room_id):
+        # Повертає (data, version). data = None, якщо кімнати нема
+        while True:
+            with self._lock:
+                self._evict()
+
+                entry = self._entries.get(room_id)
+                if entry and time.time() - entry.fetched_at < self.ttl:
+                    entry.last_used = time.time()
+                    # Віддаємо копію: dict спільний для всіх сесій, псувати його не можна
+                    return copy.deepcopy(entry.data), entry.version
+
+                # Хтось уже читає цю кімнату — чекаємо на його результат
+                waiter = self._inflight.get(room_id)
+                if waiter is None:
+                    waiter = threading.Event()
+                    self._inflight[room_id] = waiter
+                    break
+
+            waiter.wait()
+            # Після пробудження знову беремо з кешу (або самі підемо в базу, якщо той запит впав)
+
+        try:
+            try:
+                doc = self.db.collection("rooms").document(room_id).get()
+            except Exception:
+                # База не відповіла — краще останній відомий стан, ніж нічого
+                known = self.last_known(room_id)
+                if known is None:
+                    raise
+                return known
+            data = doc.to_dict() if doc.exists else None
+            return self.put(room_id, data)
+        finally:
+            with self._lock:
+                del self._inflight[room_id]
+            waiter.set()
+
+    def get_many(self, room_ids):
+        # Кілька кімнат: свіжі — з памʼяті, решта — ОДНИМ get_all на всіх,
+        # а не N послідовних get(). Повертає {room_id: (data, version)}
+        result, missing = {}, []
+        with self._lock:
+            self._evict()
+            now = time.time()
+            for room_id in dict.fromkeys(room_ids):
+                entry = self._entries.get(room_id)
+                if entry and now - entry.fetched_at < self.ttl:
+                    entry.last_used = now
+                    result[room_id] = copy.deepcopy(entry.data), entry.version
+                else:
+                    missing.append(room_id)
+
+        if missing:
+            refs = [self.db.collection("rooms").document(room_id) for room_id in missing]
+            found = {snap.id: snap.to_dict() for snap in self.db.get_all(refs) if snap.exists}
+            for room_id in missing:
+                result[room_id] = self.put(room_id, found.get(room_id))
+        return result
+
+    def put(self, room_id, data):
+        # Кладемо свіжі дані (з бази, зі снапшота або після власного запису).
+        # Версія росте тільки якщо дані справді інші
+        with self._lock:
+            entry = self._entries.get(room_id)
+            if entry is None:
+                entry = _Entry(data, 1)
+                self._entries[room_id] = entry
+            elif entry.data != data:
+                entry.data = data
+                entry.version += 1
+            entry.fetched_at = time.time()
+            entry.last_used = time.time()
+            return copy.deepcopy(entry.data), entry.version
+
+    def last_known(self, room_id):
+        # (data, version) з памʼяті, навіть несвіжі, без походу в базу; None — нічого нема
+        with self._lock:
+            entry = self._entries.get(room_id)
+            if entry is None:
+                return None
+            return copy.deepcopy(entry.data), entry.version
+
+    def invalidate(self, room_id):
+        # Наступний get() точно піде в базу (наприклад, після нашого ж update)
+        with self._lock:
+            entry = self._entries.get(room_id)
+            if entry:
+                entry.fetched_at = 0
+
+    def _evict(self):
+        # Викидаємо кімнати, які давно ніхто не читав (викликати під self._lock)
+        now = time.time()
+        for room_id, entry in list(self._entries.items()):
+            if now - entry.last_used > self.evict_after:
+                del self._entries[room_id]
@@ -0,0 +1,95 @@
+# ===============================
+# КОДИ КІМНАТ
+# ===============================
+# Раніше код генерувався навмання і кімната писалась через .set() —
+# якщо такий код уже був, чужа кімната просто перезаписувалась.
+# Тепер:
+#   * кімната створюється через .create() (лише якщо такого документа ще нема);
+#   * тримаємо невеликий запас кодів, про які вже перевірили, що вони вільні,
+#     щоб створення кімнати не платило за повторні спроби.
+
+import random
+import string
+import threading
+
+
+# Скільки перевірених кодів тримаємо про запас
+POOL_SIZE = 8
+
+# Скільки разів пробуємо створити кімнату, перш ніж здатись
+MAX_ATTEMPTS = 10
+
+
+def generate_room_code():
+    # Генеруємо 4 великі літери
+    letters = ''.join(random.choices(string.ascii_uppercase, k=4))
+
+    # Генеруємо 2 цифри
+    digits = ''.join(random.choices(string.digits, k=2))
+
+    # Об'єднуємо літери й цифри в список
+    code_list = list(letters + digits)
+
+    # Перемішуємо символи
+    random.shuffle(code_list)
+
+    # Повертаємо код як рядок
+    return ''.join(code_list)
+
+
+class RoomCodePool:
+
+    def __init__(self, db, size=POOL_SIZE):
+        self.db = db
+        self.size = size
+        self._free = []                 # коди, які на момент перевірки були вільні
+        self._lock = threading.Lock()
+        self._refilling = False
+
+    def _refill(self):
+        # Перевіряємо пачку кандидатів одним batch-читанням (get_all)
+        try:
+            candidates = {generate_room_code() for _ in range(self.size)}
+            refs = [self.db.collection("rooms").document(c) for c in candidates]
+            taken = {snap.id for snap in self.db.get_all(refs) if snap.exists}
+
+            with self._lock:
+                self._free.extend(c for c in candidates if c not in taken and c not in self._free)
+        except Exception:
+            pass    # не вийшло — не страшно, allocate() впорається і без запасу
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _refill_in_background(self):
+        # Поповнюємо запас у фоні, щоб не гальмувати того, хто зараз створює кімнату
+        with self._lock:
+            if self._refilling or len(self._free) >= self.size // 2:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, daemon=True).start()
+
+    def _next_code(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return generate_room_code()
+
+    def allocate(self, room_data):
+        # Створює кімнату з вільним кодом і повертає цей код.
+        # create() атомарний: якщо код хтось устиг зайняти — пробуємо наступний.
+        # Імпорт тут: generate_room_code() і MAX_ATTEMPTS беруть і сховища без Firestore
+        from google.api_core.exceptions import AlreadyExists
+
+        try:
+            for _ in range(MAX_ATTEMPTS):
+                code = self._next_code()
+                try:
+                    self.db.collection("rooms").document(code).create(room_data)
+                    return code
+                except AlreadyExists:
+                    continue
+        finally:
+            self._refill_in_background()
+
+        raise RuntimeError("Не вдалося підібрати вільний код кімнати")
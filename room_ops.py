@@ -0,0 +1,149 @@
+# ===============================
+# ЗАПИСИ В КІМНАТУ (атомарно)
+# ===============================
+# Раніше бали рахувались у Python (прочитали scores, +1, записали всю мапу назад),
+# а кінець ходу / новий раунд писав кожен клієнт зі своєї (можливо старої) копії.
+# Через це губились бали і перескакували раунди.
+#
+# Тут:
+#   * бали — атомарний Increment на сервері Firestore;
+#   * переходи ходу — транзакції з перевіркою поля "version"
+#     (версія стану кімнати росте на кожному переході).
+# Якщо хтось уже встиг зробити перехід — наша транзакція просто нічого не пише.
+#
+# Слова ходу в документі кімнати не лежать: його читають усі гравці, тож слухач
+# бачив би відповідь. Пачка слів і результати ходу живуть у
+# rooms/<код>/secrets/<хеш ніка пояснювача>, колода — в rooms/<код>/secrets/deck.
+# Читає їх тільки пояснювач (і хост на старті ходу).
+
+import hashlib
+
+from google.cloud import firestore
+
+import room_state
+
+
+def room_ref(db, room_id):
+    return db.collection("rooms").document(room_id)
+
+
+def touched(updates):
+    # Кожен запис у кімнату оновлює час останньої активності —
+    # по ньому room_sweeper.py прибирає покинуті кімнати
+    return dict(updates, updated_at=firestore.SERVER_TIMESTAMP)
+
+
+def secret_ref(db, room_id, explainer):
+    # Таємний документ пояснювача: {"explainer", "t_end", "words", "log"}.
+    # ID — хеш ніка (в ніку можуть бути "/" та інші заборонені для ID символи)
+    doc_id = hashlib.sha1(explainer.encode("utf-8")).hexdigest()
+    return room_ref(db, room_id).collection("secrets").document(doc_id)
+
+
+def deck_ref(db, room_id):
+    # Колода кімнати (seed + курсор) — з неї теж можна відновити слова, тому поруч із секретами
+    return room_ref(db, room_id).collection("secrets").document("deck")
+
+
+def load_secret(db, room_id, explainer):
+    # Пачка слів пояснювача на поточний хід (None — ще нема)
+    snap = secret_ref(db, room_id, explainer).get()
+    return snap.to_dict() if snap.exists else None
+
+
+def score_field(player):
+    # Нік може містити крапки, пробіли і т.д., тому шлях до поля екрануємо
+    return firestore.Client.field_path("scores", player)
+
+
+def flush_results(db, room_id, player, results):
+    # Один batch на пачку результатів пояснювача: [{"word": ..., "guessed": bool}, ...]
+    # Самі слова — в таємний документ, а в кімнату — лише бали
+    # (атомарний Increment на сервері, без read-modify-write)
+    batch = db.batch()
+    batch.update(secret_ref(db, room_id, player), {"log": firestore.ArrayUnion(results)})
+
+    # Самі пропуски кімнату не чіпають — підписаним гравцям нема чого оновлювати
+    guessed = sum(1 for r in results if r["guessed"])
+    if guessed:
+        batch.update(room_ref(db, room_id), touched({score_field(player): firestore.Increment(guessed)}))
+
+    batch.commit()
+
+
+@firestore.transactional
+def _run_deal_more(transaction, db, room_id, explainer, deal):
+    snap = deck_ref(db, room_id).get(transaction=transaction)
+    words, deck = deal(snap.to_dict() if snap.exists else None)
+
+    transaction.set(deck_ref(db, room_id), deck)
+    transaction.update(secret_ref(db, room_id, explainer), {"words": firestore.ArrayUnion(words)})
+    return words
+
+
+def deal_more(db, room_id, explainer, deal):
+    # Пояснювач догортав пачку до кінця — доздаємо ще слів з колоди кімнати.
+    # deal(deck) -> (слова, колода з посунутим курсором). Повертає нові слова
+    return _run_deal_more(db.transaction(), db, room_id, explainer, deal)
+
+
+@firestore.transactional
+def _run_transition(transaction, ref, expected_version, make_updates):
+    snap = ref.get(transaction=transaction)
+    if not snap.exists:
+        return False
+
+    data = snap.to_dict()
+
+    # Хтось уже змінив стан кімнати після того, як ми її бачили
+    if data.get("version", 0) != expected_version:
+        return False
+
+    updates = make_updates(data, transaction)
+    if updates is None:
+        return False
+
+    updates["version"] = expected_version + 1
+    transaction.update(ref, touched(updates))
+    return True
+
+
+def transition(db, room_id, expected_version, make_updates):
+    # make_updates(data, transaction) -> dict з оновленнями або None, якщо перехід уже не актуальний
+    # (через transaction можна ще щось прочитати й записати поруч — але читати до будь-яких записів).
+    # Повертає True, якщо саме ми зробили перехід
+    return _run_transition(db.transaction(), room_ref(db, room_id), expected_version, make_updates)
+
+
+def start_turn(db, room_id, expected_version, explainer, listener, deal, t_end):
+    # Хост стартує хід — тільки якщо зараз ніхто не пояснює.
+    # deal(deck) -> (пачка слів на весь хід, колода з посунутим курсором);
+    # пачка йде в таємний документ пояснювача, а в кімнату — тільки хто і до коли
+    def make_updates(data, transaction):
+        updates = room_state.start_turn(data, explainer, listener, t_end)
+        if updates is None:
+            return None
+
+        snap = deck_ref(db, room_id).get(transaction=transaction)
+        words, deck = deal(snap.to_dict() if snap.exists else None)
+
+        transaction.set(deck_ref(db, room_id), deck)
+        transaction.set(secret_ref(db, room_id, explainer), {
+            "explainer": explainer,
+            "t_end": t_end,
+            "words": words,
+            "log": []
+        })
+        return updates
+
+    return transition(db, room_id, expected_version, make_updates)
+
+
+def end_turn(db, room_id, expected_version):
+    # Час вийшов — знімаємо пояснювача і слухача і переходимо до наступного раунду.
+    # Викликає лише room_state.turn_authority() (або turn_reaper.py); транзакція з версією
+    # гарантує, що навіть при збігу перехід запишеться один раз
+    def make_updates(data, transaction):
+        return room_state.end_turn(data)   # номер раунду — зі свіжого снапшота
+
+    return transition(db, room_id, expected_version, make_updates)
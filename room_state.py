@@ -0,0 +1,84 @@
+# ===============================
+# СТАНИ КІМНАТИ (машина станів)
+# ===============================
+# Раніше в головному скрипті було три блоки playing_sync (працював лише перший),
+# і кожен по-своєму вирішував, що зараз відбувається в кімнаті і що писати в базу.
+# Тут — одне місце для цього:
+#   * phase(data, now) — в якому стані кімната;
+#   * переходи — чисті функції: беруть документ кімнати (dict) і повертають
+#     мінімальне оновлення (тільки поля, що змінюються) або None, якщо перехід
+#     з цього стану неможливий.
+# Без Streamlit і без Firestore — можна ганяти локально.
+
+import time
+
+
+LOBBY = "lobby"                 # гравці збираються, хост налаштовує
+TURN_PENDING = "turn_pending"   # гра йде, чекаємо, поки хост стартує хід
+TURN_ACTIVE = "turn_active"     # хтось пояснює, таймер тікає
+TURN_OVER = "turn_over"         # час ходу вийшов, але хід ще не закрито
+FINISHED = "finished"           # усі раунди зіграно
+
+
+def phase(data, now=None):
+    if now is None:
+        now = time.time()
+
+    if data.get("state") != "playing":
+        return LOBBY
+    if data.get("current_round", 1) > data.get("total_rounds", 3):
+        return FINISHED
+    if not data.get("explainer"):
+        return TURN_PENDING
+    if (data.get("t_end") or 0) <= now:
+        return TURN_OVER
+    return TURN_ACTIVE
+
+
+def changed(data, desired):
+    # Лише ті поля, значення яких відрізняється від поточного документа
+    return {k: v for k, v in desired.items() if k not in data or data[k] != v}
+
+
+def start_game(data):
+    # Хост запускає гру з лобі
+    if phase(data) != LOBBY:
+        return None
+    return changed(data, {
+        "state": "playing",
+        "current_round": 1,
+        "explainer": "",
+        "listener": ""
+    })
+
+
+def start_turn(data, explainer, listener, t_end):
+    # Хост обрав пару — хід стартує, тільки якщо зараз ніхто не пояснює
+    if phase(data) != TURN_PENDING:
+        return None
+    return changed(data, {
+        "explainer": explainer,
+        "listener": listener,
+        "t_end": t_end
+    })
+
+
+def end_turn(data):
+    # Закриваємо хід (тільки якщо він ще не закритий) і переходимо до наступного раунду.
+    # t_end = None: кімната більше не потрапляє в числовий запит turn_reaper.py
+    if not data.get("explainer") or phase(data) == LOBBY:
+        return None
+    return changed(data, {
+        "explainer": "",
+        "listener": "",
+        "t_end": None,
+        "current_round": data.get("current_round", 1) + 1
+    })
+
+
+def turn_authority(host, online_players):
+    # Хто закриває хід, коли вийшов час: хост, а якщо він офлайн — перший онлайн-гравець.
+    # Так на кінець ходу припадає один запис на кімнату, а не по одному від кожного клієнта
+    if host in online_players or not online_players:
+        return host
+    return online_players[0]
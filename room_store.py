@@ -0,0 +1,76 @@
+# ===============================
+# СХОВИЩЕ КІМНАТ (інтерфейс)
+# ===============================
+# Головний скрипт більше не ходить у Firestore напряму: все, що він робить
+# з кімнатою, — це методи RoomStore. Реалізації:
+#   * FirestoreRoomStore (firestore_store.py) — підписки, кеш, транзакції, presence;
+#   * MemoryRoomStore (memory_store.py) — все в памʼяті процесу,
+#     для одного сервера без Firestore (db = None).
+#
+# subscribe() повертає обʼєкт з get(timeout) -> (data, version)
+# і wait_for_change(version, timeout) — як room_sync.RoomSubscription.
+#
+# Якщо база не відповідає (таймаут, мережа, запобіжник з db_policy.py),
+# методи кидають StoreUnavailable — екран ловить її і живе далі на останньому
+# відомому стані, а не падає.
+
+
+class StoreUnavailable(Exception):
+    # Сховище зараз не відповідає; варто спробувати трохи згодом
+    pass
+
+
+class RoomStore:
+    # Що має вміти кожне сховище кімнат
+
+    def create_room(self, room_data):
+        # Створює кімнату з вільним кодом, повертає код
+        raise NotImplementedError
+
+    def get_room(self, room_id):
+        # (data, version); data = None, якщо кімнати нема
+        raise NotImplementedError
+
+    def get_rooms(self, room_ids):
+        # Кілька кімнат разом: {room_id: (data, version)}.
+        # Тут — по одній; сховища, які вміють пакетне читання, це перекривають
+        return {room_id: self.get_room(room_id) for room_id in room_ids}
+
+    def active_rooms(self, limit=20):
+        # [(room_id, data)] кімнат, де нещодавно щось відбувалось (свіжіші першими)
+        raise NotImplementedError
+
+    def subscribe(self, room_id):
+        raise NotImplementedError
+
+    def update_room(self, room_id, fields=None, scores=None, increments=None,
+                    add_players=(), remove_players=()):
+        # Часткове оновлення: поля, бали окремих гравців, прирости, гравці +/-
+        raise NotImplementedError
+
+    def start_turn(self, room_id, expected_version, explainer, listener, deal, t_end):
+        # deal(deck) -> (слова, колода). True — якщо хід стартували саме ми
+        raise NotImplementedError
+
+    def deal_more(self, room_id, explainer, deal):
+        # Доздає слова пояснювачу, повертає нові слова
+        raise NotImplementedError
+
+    def load_secret(self, room_id, explainer):
+        # {"explainer", "t_end", "words", "log"} або None
+        raise NotImplementedError
+
+    def flush_results(self, room_id, player, results):
+        raise NotImplementedError
+
+    def end_turn(self, room_id, expected_version):
+        raise NotImplementedError
+
+    def heartbeat(self, room_id, player):
+        raise NotImplementedError
+
+    def leave(self, room_id, player):
+        raise NotImplementedError
+
+    def online(self, room_id, players):
+        raise NotImplementedError
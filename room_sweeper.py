@@ -0,0 +1,101 @@
+# ===============================
+# ПРИБИРАННЯ ПОКИНУТИХ КІМНАТ
+# ===============================
+# Кімнати ніхто не видаляв: гравці виходять, а документ лишається назавжди.
+# Кожен запис у кімнату оновлює поле updated_at (див. room_ops.touched),
+# а цей скрипт пачками видаляє:
+#   * кімнати, де давно нічого не відбувалось (updated_at старший за --idle-minutes);
+#   * порожні кімнати (players == []), щойно вони постоять --empty-minutes.
+#
+# Приклад (проти локального емулятора):
+#   python room_sweeper.py --emulator localhost:8080 --idle-minutes 120
+#   python room_sweeper.py --emulator localhost:8080 --dry-run
+
+import argparse
+import datetime
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from db_client import add_db_args, connect
+
+
+# Firestore дозволяє до 500 операцій в одному batch
+BATCH_SIZE = 400
+
+# Підколекції кімнати, які треба видаляти разом з нею
+SUBCOLLECTIONS = ("presence", "secrets")
+
+
+def _delete_in_batches(db, snaps, dry_run):
+    # Видаляє документи пачками по BATCH_SIZE. Повертає кількість
+    deleted = 0
+    batch = db.batch()
+    pending = 0
+
+    for snap in snaps:
+        if not dry_run:
+            # Разом з кімнатою — її підколекції (самі вони не видаляються)
+            refs = [ref for name in SUBCOLLECTIONS
+                    for ref in snap.reference.collection(name).list_documents()]
+            refs.append(snap.reference)
+
+            for ref in refs:
+                batch.delete(ref)
+                pending += 1
+                if pending >= BATCH_SIZE:
+                    batch.commit()
+                    batch = db.batch()
+                    pending = 0
+        deleted += 1
+
+    if pending:
+        batch.commit()
+    return deleted
+
+
+def sweep_rooms(db, idle_minutes=120, empty_minutes=5, dry_run=False):
+    # Прибирає покинуті кімнати. Повертає (скільки неактивних, скільки порожніх)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rooms = db.collection("rooms")
+
+    # Давно неактивні (тягнемо лише updated_at — решта даних не потрібна)
+    idle = (rooms
+            .where(filter=FieldFilter("updated_at", "<", now - datetime.timedelta(minutes=idle_minutes)))
+            .select(["updated_at"])
+            .stream())
+    idle_count = _delete_in_batches(db, idle, dry_run)
+
+    # Порожні: всі вийшли, а кімната висить. Вік фільтруємо вже тут,
+    # щоб не вимагати від Firestore складеного індексу (players + updated_at).
+    # Старі кімнати без updated_at теж прибираємо
+    empty_before = now - datetime.timedelta(minutes=empty_minutes)
+    empty = (snap for snap in (rooms
+                               .where(filter=FieldFilter("players", "==", []))
+                               .select(["updated_at"])
+                               .stream())
+             if snap.to_dict().get("updated_at", empty_before) <= empty_before)
+    empty_count = _delete_in_batches(db, empty, dry_run)
+
+    return idle_count, empty_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Видаляє покинуті та порожні кімнати з Firestore")
+    add_db_args(parser)
+    parser.add_argument("--idle-minutes", type=int, default=120,
+                        help="видаляти кімнати без активності довше за стільки хвилин")
+    parser.add_argument("--empty-minutes", type=int, default=5,
+                        help="видаляти порожні кімнати, які простояли стільки хвилин")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="тільки порахувати, нічого не видаляти")
+    args = parser.parse_args()
+
+    db = connect(args)
+    idle_count, empty_count = sweep_rooms(db, args.idle_minutes, args.empty_minutes, args.dry_run)
+
+    verb = "знайдено" if args.dry_run else "видалено"
+    print(f"[SWEEPER] {verb}: неактивних {idle_count}, порожніх {empty_count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ===============================
+# ПІДПИСКА НА КІМНАТИ (Firestore on_snapshot)
+# ===============================
+# Замість того, щоб кожен гравець робив ref.get() + time.sleep() + st.rerun(),
+# тримаємо ОДИН слухач на кімнату на весь процес сервера.
+# Firestore сам пушить зміни, ми зберігаємо останній стан у пам'яті,
+# а сесії просто чекають, поки документ реально зміниться.
+
+import copy
+import threading
+import time
+
+
+# Скільки секунд підписка може жити без жодної сесії, яка її читає
+IDLE_UNSUBSCRIBE_SEC = 600
+
+
+class RoomSubscription:
+    # Одна підписка = один документ rooms/<code>
+
+    def __init__(self, ref, on_change=None, ops=None, fallback=None):
+        self.ref = ref
+        self.on_change = on_change    # Колбек (room_id, data) — напр. щоб оновити спільний кеш
+        self.fallback = fallback      # room_id -> (data, version) або None: що віддати, поки снапшота нема
+        self.ops = ops                # OpCounter: кожен снапшот — одне читання, записане на кімнату
+        self.data = None              # Останній стан кімнати (dict) або None, якщо документа нема
+        self.version = 0              # Росте тільки коли дані реально змінились
+        self.ready = False            # Чи прийшов уже перший снапшот
+        self.last_used = time.time()  # Коли сесії востаннє читали цю кімнату
+        self._cond = threading.Condition()
+
+        # Запускаємо слухача (працює у фоновому потоці Firestore)
+        self._watch = ref.on_snapshot(self._on_snapshot)
+
+    def _on_snapshot(self, docs, changes, read_time):
+        # Для документа приходить список з 0 або 1 снапшота
+        # (порожній список — документ видалили або його ніколи не було)
+        new_data = docs[0].to_dict() if docs and docs[0].exists else None
+
+        if self.ops:
+            self.ops.add(reads=1, room=self.ref.id)
+        if self.on_change:
+            self.on_change(self.ref.id, new_data)
+
+        with self._cond:
+            # Повторний снапшот з тими самими даними (реконект і т.д.) — ігноруємо
+            if self.ready and new_data == self.data:
+                return
+
+            self.data = new_data
+            self.version += 1
+            self.ready = True
+
+            # Будимо всі сесії, які чекають на зміни
+            self._cond.notify_all()
+
+    def get(self, timeout=5):
+        # Повертає (data, version). Перший раз чекаємо, поки прийде снапшот
+        self.last_used = time.time()
+        with self._cond:
+            if not self.ready:
+                self._cond.wait_for(lambda: self.ready, timeout)
+            if self.ready:
+                # Копія, бо сесії інколи правлять dict на місці (scores і т.д.)
+                return copy.deepcopy(self.data), self.version
+
+        # База повільна і снапшот так і не прийшов — останній відомий стан із кешу,
+        # щоб не вирішити, що кімнати нема, і не викинути гравця з гри
+        known = self.fallback(self.ref.id) if self.fallback else None
+        return known if known is not None else (None, 0)
+
+    def wait_for_change(self, version, timeout):
+        # Блокує сесію, поки версія не зміниться або не вийде timeout.
+        # Повертає True, якщо дані змінились
+        self.last_used = time.time()
+        with self._cond:
+            return self._cond.wait_for(lambda: self.version != version, timeout)
+
+    def close(self):
+        # Відписуємось від Firestore
+        try:
+            self._watch.unsubscribe()
+        except Exception:
+            pass
+
+
+class RoomHub:
+    # Реєстр підписок на весь процес: room_id -> RoomSubscription
+
+    def __init__(self, db, cache=None, ops=None):
+        self.db = db
+        self.cache = cache      # RoomCache: снапшоти одразу підкладаємо туди
+        self.ops = ops          # OpCounter для снапшотів (див. op_counter.py)
+        self._subs = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, room_id):
+        with self._lock:
+            # Заодно прибираємо кімнати, які вже ніхто не дивиться
+            self._drop_idle()
+
+            sub = self._subs.get(room_id)
+            if sub is None:
+                sub = RoomSubscription(
+                    self.db.collection("rooms").document(room_id),
+                    on_change=self.cache.put if self.cache else None,
+                    ops=self.ops,
+                    fallback=self.cache.last_known if self.cache else None
+                )
+                self._subs[room_id] = sub
+
+            sub.last_used = time.time()
+            return sub
+
+    def _drop_idle(self):
+        now = time.time()
+        for room_id, sub in list(self._subs.items()):
+            if now - sub.last_used > IDLE_UNSUBSCRIBE_SEC:
+                sub.close()
+                del self._subs[room_id]
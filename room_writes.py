@@ -0,0 +1,76 @@
+# ===============================
+# МІНІМАЛЬНІ ЗАПИСИ В КІМНАТУ
+# ===============================
+# Раніше лобі писало в кімнату цілими полями: вхід переписував увесь список players
+# і всю мапу scores, а налаштування хоста летіли в базу, навіть якщо нічого не змінилось.
+# Кожен такий запис будить усіх, хто підписаний на кімнату.
+#
+# RoomWrites порівнює бажаний стан з останнім відомим снапшотом і:
+#   * пише тільки поля, які справді змінились;
+#   * гравців додає/прибирає поштучно (у Firestore — ArrayUnion/ArrayRemove, а не весь список);
+#   * збирає все, що назбиралось за один rerun, в один update;
+#   * якщо змін нема — в сховище не йде взагалі.
+
+
+class RoomWrites:
+
+    def __init__(self, store, room_id, known):
+        self.store = store              # RoomStore (див. room_store.py)
+        self.room_id = room_id
+        self.known = known or {}        # останній відомий стан кімнати (снапшот)
+        self._fields = {}               # поле -> нове значення
+        self._scores = {}               # гравець -> нові бали
+        self._increments = {}           # поле -> на скільки збільшити
+        self._added = []                # гравці, яких додаємо
+        self._removed = []              # гравці, яких прибираємо
+
+    def set(self, field, value):
+        # Поле пишемо, лише якщо значення відрізняється від відомого
+        if field in self.known and self.known[field] == value:
+            self._fields.pop(field, None)
+        else:
+            self._fields[field] = value
+
+    def set_score(self, player, value):
+        scores = self.known.get("scores", {})
+        if player in scores and scores[player] == value:
+            self._scores.pop(player, None)
+        else:
+            self._scores[player] = value
+
+    def increment(self, field, amount=1):
+        # Приріст — це завжди зміна
+        self._increments[field] = self._increments.get(field, 0) + amount
+
+    def add_player(self, player):
+        if player in self._removed:
+            self._removed.remove(player)
+        elif player not in self.known.get("players", []) and player not in self._added:
+            self._added.append(player)
+
+    def remove_player(self, player):
+        if player in self._added:
+            self._added.remove(player)
+        elif player in self.known.get("players", []) and player not in self._removed:
+            self._removed.append(player)
+
+    def __bool__(self):
+        return bool(self._fields or self._scores or self._increments or self._added or self._removed)
+
+    def commit(self):
+        # Один update на все накопичене. Повертає True, якщо щось записали
+        if not self:
+            return False
+
+        self.store.update_room(
+            self.room_id,
+            fields=self._fields,
+            scores=self._scores,
+            increments=self._increments,
+            add_players=self._added,
+            remove_players=self._removed
+        )
+
+        self._fields, self._scores, self._increments = {}, {}, {}
+        self._added, self._removed = [], []
+        return True
@@ -0,0 +1,444 @@
+# ===============================
+# КІМНАТИ В SQLITE (один сервер, переживає перезапуск)
+# ===============================
+# Щось середнє між памʼяттю процесу і Firestore: кімнати лежать у локальному
+# файлі SQLite в режимі WAL (читачі не блокують записувача).
+#
+# Таблиці нормалізовані:
+#   rooms       — одна кімната = один рядок (+ колода і два лічильники:
+#                 version — версія стану гри, rev — будь-яка зміна, для підписок);
+#   players     — гравці з балами (present = 0 — вийшов, але бали лишаються);
+#   turns, turn_words, turn_log — таємна пачка слів пояснювача і результати ходу.
+#
+# Переходи ходу — оптимістичні: UPDATE ... WHERE version = <та, яку ми бачили>.
+# Підписки будяться одразу на записи з цього процесу, а записи інших процесів
+# помічають, перевіряючи rev раз на POLL_SEC.
+#
+# Файл зайнятий довше за таймаут зʼєднання, диск повний чи недоступний —
+# sqlite3.OperationalError; назовні він виходить як StoreUnavailable, як і збої Firestore.
+
+import contextlib
+import sqlite3
+import threading
+import time
+
+import room_state
+from presence import HEARTBEAT_SEC, STALE_SEC
+from room_codes import MAX_ATTEMPTS, generate_room_code
+from room_store import RoomStore, StoreUnavailable
+
+
+# Як часто (сек) підписка перевіряє, чи не змінив кімнату інший процес
+POLL_SEC = 0.5
+
+# Кімнати без жодного запису довше за стільки секунд видаляємо
+IDLE_ROOM_SEC = 2 * 60 * 60
+
+# Поля кімнати, які можна міняти через update_room
+ROOM_FIELDS = ("host", "state", "total_rounds", "duration", "current_round",
+               "explainer", "listener", "t_end", "version")
+
+@contextlib.contextmanager
+def _unavailable():
+    # База заблокована / диск не відповідає -> StoreUnavailable (головний скрипт не знає про sqlite3)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        raise StoreUnavailable(str(e)) from e
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    code          TEXT PRIMARY KEY,
+    host          TEXT NOT NULL,
+    state         TEXT NOT NULL DEFAULT 'lobby',
+    total_rounds  INTEGER NOT NULL DEFAULT 3,
+    duration      INTEGER NOT NULL DEFAULT 60,
+    current_round INTEGER NOT NULL DEFAULT 1,
+    explainer     TEXT NOT NULL DEFAULT '',
+    listener      TEXT NOT NULL DEFAULT '',
+    t_end         REAL,
+    version       INTEGER NOT NULL DEFAULT 0,
+    rev           INTEGER NOT NULL DEFAULT 0,
+    updated_at    REAL NOT NULL,
+    deck_seed     INTEGER,
+    deck_size     INTEGER,
+    deck_cursor   INTEGER
+);
+CREATE INDEX IF NOT EXISTS rooms_updated_at ON rooms (updated_at);
+
+CREATE TABLE IF NOT EXISTS players (
+    room_code TEXT NOT NULL REFERENCES rooms (code) ON DELETE CASCADE,
+    name      TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    present   INTEGER NOT NULL DEFAULT 1,
+    score     INTEGER NOT NULL DEFAULT 0,
+    last_seen REAL,
+    PRIMARY KEY (room_code, name)
+);
+
+CREATE TABLE IF NOT EXISTS turns (
+    room_code TEXT NOT NULL REFERENCES rooms (code) ON DELETE CASCADE,
+    explainer TEXT NOT NULL,
+    t_end     REAL NOT NULL,
+    PRIMARY KEY (room_code, explainer)
+);
+
+CREATE TABLE IF NOT EXISTS turn_words (
+    room_code TEXT NOT NULL,
+    explainer TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    word      TEXT NOT NULL,
+    PRIMARY KEY (room_code, explainer, position),
+    UNIQUE (room_code, explainer, word),
+    FOREIGN KEY (room_code, explainer) REFERENCES turns (room_code, explainer) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS turn_log (
+    room_code TEXT NOT NULL,
+    explainer TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    word      TEXT NOT NULL,
+    guessed   INTEGER NOT NULL,
+    PRIMARY KEY (room_code, explainer, position),
+    FOREIGN KEY (room_code, explainer) REFERENCES turns (room_code, explainer) ON DELETE CASCADE
+);
+"""
+
+
+class SqliteSubscription:
+
+    def __init__(self, store, room_id):
+        self.store = store
+        self.room_id = room_id
+
+    def get(self, timeout=5):
+        return self.store.get_room(self.room_id)
+
+    def wait_for_change(self, version, timeout):
+        deadline = time.time() + timeout
+        while True:
+            if self.store._rev(self.room_id) != version:
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            with self.store._cond:
+                self.store._cond.wait(min(POLL_SEC, remaining))
+
+
+class SqliteRoomStore(RoomStore):
+
+    def __init__(self, path="rooms.db"):
+        self.path = path
+        self._local = threading.local()     # своє зʼєднання в кожному потоці
+        self._cond = threading.Condition()  # будить підписки цього процесу
+        self._beats = {}                    # (room_id, нік) -> коли востаннє писали heartbeat
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: транзакції відкриваємо самі (BEGIN IMMEDIATE)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        # with self._write() as conn: ... — одна транзакція з блокуванням на запис;
+        # збій бази (і на BEGIN, і посередині, і на COMMIT) виходить як StoreUnavailable
+        return _WriteTransaction(self)
+
+    def _notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _rev(self, room_id):
+        with _unavailable():
+            row = self._conn().execute("SELECT rev FROM rooms WHERE code = ?", (room_id,)).fetchone()
+        return row["rev"] if row else 0
+
+    def _load(self, conn, room_id):
+        # Кімната в тому ж вигляді, що й документ Firestore: (data, rev)
+        room = conn.execute("SELECT * FROM rooms WHERE code = ?", (room_id,)).fetchone()
+        if room is None:
+            return None, 0
+
+        rows = conn.execute(
+            "SELECT name, present, score FROM players WHERE room_code = ? ORDER BY position",
+            (room_id,)).fetchall()
+        data = {k: room[k] for k in ROOM_FIELDS}
+        data["updated_at"] = room["updated_at"]
+        data["players"] = [r["name"] for r in rows if r["present"]]
+        data["scores"] = {r["name"]: r["score"] for r in rows}
+        return data, room["rev"]
+
+    def _deck(self, room):
+        if room["deck_seed"] is None:
+            return None
+        return {"seed": room["deck_seed"], "size": room["deck_size"], "cursor": room["deck_cursor"]}
+
+    def _save_deck(self, conn, room_id, deck):
+        conn.execute("UPDATE rooms SET deck_seed = ?, deck_size = ?, deck_cursor = ? WHERE code = ?",
+                     (deck["seed"], deck["size"], deck["cursor"], room_id))
+
+    def _touch(self, conn, room_id):
+        # Будь-яка зміна кімнати: rev + 1 (його чекають підписки) і час активності
+        conn.execute("UPDATE rooms SET rev = rev + 1, updated_at = ? WHERE code = ?", (time.time(), room_id))
+
+    def _set_players(self, conn, room_id, add_players=(), remove_players=()):
+        for name in add_players:
+            position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM players WHERE room_code = ?",
+                                    (room_id,)).fetchone()[0]
+            conn.execute(
+                "INSERT INTO players (room_code, name, position) VALUES (?, ?, ?) "
+                "ON CONFLICT (room_code, name) DO UPDATE SET present = 1, position = excluded.position "
+                "WHERE present = 0",
+                (room_id, name, position))
+        for name in remove_players:
+            conn.execute("UPDATE players SET present = 0 WHERE room_code = ? AND name = ?", (room_id, name))
+
+    def _set_score(self, conn, room_id, player, score):
+        conn.execute(
+            "INSERT INTO players (room_code, name, position, present, score) "
+            "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM players WHERE room_code = ?), 0, ?) "
+            "ON CONFLICT (room_code, name) DO UPDATE SET score = excluded.score",
+            (room_id, player, room_id, score))
+
+    def create_room(self, room_data):
+        with self._write() as conn:
+            conn.execute("DELETE FROM rooms WHERE updated_at < ?", (time.time() - IDLE_ROOM_SEC,))
+
+            for _ in range(MAX_ATTEMPTS):
+                code = generate_room_code()
+                try:
+                    conn.execute("INSERT INTO rooms (code, host, updated_at) VALUES (?, ?, ?)",
+                                 (code, room_data["host"], time.time()))
+                except sqlite3.IntegrityError:
+                    continue
+                fields = {k: v for k, v in room_data.items() if k in ROOM_FIELDS}
+                self._update(conn, code, fields, room_data.get("scores"), None, room_data.get("players", []), ())
+                return code
+        raise RuntimeError("Не вдалося підібрати вільний код кімнати")
+
+    def get_room(self, room_id):
+        with _unavailable():
+            return self._load(self._conn(), room_id)
+
+    def get_rooms(self, room_ids):
+        # Одна транзакція читання — усі кімнати з одного знімка бази
+        with _unavailable():
+            conn = self._conn()
+            conn.execute("BEGIN")
+            try:
+                return {room_id: self._load(conn, room_id) for room_id in room_ids}
+            finally:
+                conn.execute("COMMIT")
+
+    def active_rooms(self, limit=20):
+        with _unavailable():
+            codes = [r["code"] for r in self._conn().execute(
+                "SELECT code FROM rooms ORDER BY updated_at DESC LIMIT ?", (limit,)).fetchall()]
+        rooms = self.get_rooms(codes)
+        return [(code, rooms[code][0]) for code in codes if rooms[code][0] is not None]
+
+    def subscribe(self, room_id):
+        return SqliteSubscription(self, room_id)
+
+    def _update(self, conn, room_id, fields, scores, increments, add_players, remove_players):
+        # Викликати всередині транзакції
+        unknown = set(fields or {}).union(increments or {}) - set(ROOM_FIELDS)
+        if unknown:
+            raise ValueError(f"Невідомі поля кімнати: {sorted(unknown)}")
+
+        if fields:
+            assignments = ", ".join(f"{k} = ?" for k in fields)
+            conn.execute(f"UPDATE rooms SET {assignments} WHERE code = ?", (*fields.values(), room_id))
+        for field, amount in (increments or {}).items():
+            conn.execute(f"UPDATE rooms SET {field} = {field} + ? WHERE code = ?", (amount, room_id))
+        self._set_players(conn, room_id, add_players, remove_players)
+        for player, score in (scores or {}).items():
+            self._set_score(conn, room_id, player, score)
+        self._touch(conn, room_id)
+
+    def update_room(self, room_id, fields=None, scores=None, increments=None,
+                    add_players=(), remove_players=()):
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM rooms WHERE code = ?", (room_id,)).fetchone() is None:
+                return
+            self._update(conn, room_id, fields, scores, increments, add_players, remove_players)
+
+    def _transition(self, conn, room_id, expected_version, updates):
+        # Оптимістично: запишеться, лише якщо версія не змінилась з нашого снапшота
+        assignments = "".join(f", {k} = ?" for k in updates)
+        cur = conn.execute(
+            f"UPDATE rooms SET version = version + 1{assignments} WHERE code = ? AND version = ?",
+            (*updates.values(), room_id, expected_version))
+        if cur.rowcount != 1:
+            return False
+        self._touch(conn, room_id)
+        return True
+
+    def start_turn(self, room_id, expected_version, explainer, listener, deal, t_end):
+        with self._write() as conn:
+            data, _ = self._load(conn, room_id)
+            if data is None or data["version"] != expected_version:
+                return False
+            updates = room_state.start_turn(data, explainer, listener, t_end)
+            if updates is None or not self._transition(conn, room_id, expected_version, updates):
+                return False
+
+            room = conn.execute("SELECT * FROM rooms WHERE code = ?", (room_id,)).fetchone()
+            words, deck = deal(self._deck(room))
+            self._save_deck(conn, room_id, deck)
+
+            conn.execute("DELETE FROM turns WHERE room_code = ? AND explainer = ?", (room_id, explainer))
+            conn.execute("INSERT INTO turns (room_code, explainer, t_end) VALUES (?, ?, ?)",
+                         (room_id, explainer, t_end))
+            conn.executemany(
+                "INSERT OR IGNORE INTO turn_words (room_code, explainer, position, word) VALUES (?, ?, ?, ?)",
+                [(room_id, explainer, i, w) for i, w in enumerate(words)])
+            return True
+
+    def end_turn(self, room_id, expected_version):
+        with self._write() as conn:
+            data, _ = self._load(conn, room_id)
+            if data is None or data["version"] != expected_version:
+                return False
+            updates = room_state.end_turn(data)
+            return updates is not None and self._transition(conn, room_id, expected_version, updates)
+
+    def deal_more(self, room_id, explainer, deal):
+        with self._write() as conn:
+            room = conn.execute("SELECT * FROM rooms WHERE code = ?", (room_id,)).fetchone()
+            if room is None:
+                return []
+            words, deck = deal(self._deck(room))
+            self._save_deck(conn, room_id, deck)
+
+            position = conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM turn_words WHERE room_code = ? AND explainer = ?",
+                (room_id, explainer)).fetchone()[0]
+            added = []
+            for word in words:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO turn_words (room_code, explainer, position, word) VALUES (?, ?, ?, ?)",
+                    (room_id, explainer, position, word))
+                if cur.rowcount:
+                    added.append(word)
+                    position += 1
+            return added
+
+    def load_secret(self, room_id, explainer):
+        with _unavailable():
+            conn = self._conn()
+            turn = conn.execute("SELECT t_end FROM turns WHERE room_code = ? AND explainer = ?",
+                                (room_id, explainer)).fetchone()
+            if turn is None:
+                return None
+            words = conn.execute(
+                "SELECT word FROM turn_words WHERE room_code = ? AND explainer = ? ORDER BY position",
+                (room_id, explainer)).fetchall()
+            log = conn.execute(
+                "SELECT word, guessed FROM turn_log WHERE room_code = ? AND explainer = ? ORDER BY position",
+                (room_id, explainer)).fetchall()
+            return {
+                "explainer": explainer,
+                "t_end": turn["t_end"],
+                "words": [r["word"] for r in words],
+                "log": [{"word": r["word"], "guessed": bool(r["guessed"])} for r in log]
+            }
+
+    def flush_results(self, room_id, player, results):
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM turns WHERE room_code = ? AND explainer = ?",
+                            (room_id, player)).fetchone():
+                position = conn.execute(
+                    "SELECT COALESCE(MAX(position), -1) + 1 FROM turn_log WHERE room_code = ? AND explainer = ?",
+                    (room_id, player)).fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO turn_log (room_code, explainer, position, word, guessed) VALUES (?, ?, ?, ?, ?)",
+                    [(room_id, player, position + i, r["word"], int(r["guessed"])) for i, r in enumerate(results)])
+
+            # Самі пропуски кімнату не чіпають (як і у Firestore)
+            guessed = sum(1 for r in results if r["guessed"])
+            if guessed:
+                conn.execute("UPDATE players SET score = score + ? WHERE room_code = ? AND name = ?",
+                             (guessed, room_id, player))
+                self._touch(conn, room_id)
+
+    def heartbeat(self, room_id, player):
+        # Пишемо не на кожен rerun, а раз на HEARTBEAT_SEC
+        now = time.time()
+        with self._cond:
+            if now - self._beats.get((room_id, player), 0) < HEARTBEAT_SEC:
+                return
+            self._beats[(room_id, player)] = now
+        # Heartbeat — не критичний: не записався зараз (база зайнята), запишеться наступний
+        try:
+            self._conn().execute("UPDATE players SET last_seen = ? WHERE room_code = ? AND name = ?",
+                                 (now, room_id, player))
+        except sqlite3.OperationalError:
+            with self._cond:
+                self._beats.pop((room_id, player), None)
+
+    def leave(self, room_id, player):
+        with self._cond:
+            self._beats.pop((room_id, player), None)
+        # Не вдалося прибрати відмітку — гравець сам стане офлайн через STALE_SEC
+        try:
+            self._conn().execute("UPDATE players SET last_seen = NULL WHERE room_code = ? AND name = ?",
+                                 (room_id, player))
+        except sqlite3.OperationalError:
+            pass
+
+    def online(self, room_id, players):
+        now = time.time()
+        with _unavailable():
+            rows = self._conn().execute("SELECT name, last_seen FROM players WHERE room_code = ?",
+                                        (room_id,)).fetchall()
+        seen = {r["name"]: r["last_seen"] or 0 for r in rows}
+        return [p for p in players if now - seen.get(p, 0) < STALE_SEC]
+
+
+class _WriteTransaction:
+    # BEGIN IMMEDIATE ... COMMIT (або ROLLBACK при помилці), потім будимо підписки
+
+    def __init__(self, store):
+        self.store = store
+        with _unavailable():
+            self.conn = store._conn()
+
+    def __enter__(self):
+        with _unavailable():
+            self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            try:
+                self.conn.execute("COMMIT")
+            except sqlite3.OperationalError as e:
+                self._rollback()
+                raise StoreUnavailable(str(e)) from e
+            self.store._notify()
+            return False
+
+        self._rollback()
+        if issubclass(exc_type, sqlite3.OperationalError):
+            raise StoreUnavailable(str(exc)) from exc
+        return False
+
+    def _rollback(self):
+        # Після деяких збоїв SQLite сам відкочує транзакцію — тоді ROLLBACK вже нема чого робити
+        if self.conn.in_transaction:
+            try:
+                self.conn.execute("ROLLBACK")
+            except sqlite3.OperationalError:
+                pass
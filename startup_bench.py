@@ -0,0 +1,88 @@
+# ===============================
+# ЗАМІР ХОЛОДНОГО СТАРТУ (перший екран)
+# ===============================
+# Скільки часу минає від запуску процесу до першого намальованого екрана.
+# Кожен прогін — окремий свіжий процес Python (нічого не закешовано в sys.modules),
+# у якому AppTest виконує головний скрипт без браузера.
+#
+# Друкує медіану і максимум по прогонах:
+#   * import streamlit — скільки коштує сам Streamlit (від нас не залежить);
+#   * перший екран — від початку виконання скрипта до готового екрана;
+#   * усього — від старту процесу (інтерпретатор + імпорти + екран);
+# і які важкі модулі (Firestore, gRPC) встигли підтягнутись — для welcome та IRL їх бути не повинно.
+#
+# Приклад:
+#   python startup_bench.py --runs 5
+#   python startup_bench.py --mode irl
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+SCRIPT = "ЗНАЧИТЬ ТАК.py"
+
+# Модулі, яких не має бути в процесі, поки гравець не пішов у Discord-режим
+HEAVY_MODULES = ("google.cloud.firestore", "google.oauth2.service_account", "grpc")
+
+# Що виконується у свіжому процесі: малює перший екран і звітує JSON-рядком
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+if sys.argv[2]:
+    at.query_params["mode"] = sys.argv[2]
+at.run()
+painted = time.perf_counter()
+
+print(json.dumps({
+    "streamlit": imported - started,
+    "first_paint": painted - imported,
+    "errors": [e.message for e in at.exception],
+    "heavy": [m for m in json.loads(sys.argv[3]) if m in sys.modules],
+}))
+'''
+
+
+def probe(mode):
+    # Один холодний прогін. Повертає (звіт із процесу, загальний час у секундах)
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", PROBE, SCRIPT, mode or "", json.dumps(HEAVY_MODULES)],
+                         capture_output=True, text=True, check=True)
+    total = time.perf_counter() - started
+    # Streamlit може щось писати в stdout — звіт завжди останній рядок
+    return json.loads(out.stdout.strip().splitlines()[-1]), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замір холодного старту: час до першого екрана")
+    parser.add_argument("--runs", type=int, default=5, help="скільки свіжих процесів запустити")
+    parser.add_argument("--mode", choices=["irl", "discord"],
+                        help="відкрити сторінку з ?mode=... (екран сетапу замість welcome)")
+    args = parser.parse_args()
+
+    streamlit_ms, paint_ms, total_ms = [], [], []
+    heavy = set()
+    for _ in range(args.runs):
+        report, total = probe(args.mode)
+        if report["errors"]:
+            raise SystemExit(f"Скрипт впав: {report['errors'][0]}")
+        streamlit_ms.append(report["streamlit"] * 1000)
+        paint_ms.append(report["first_paint"] * 1000)
+        total_ms.append(total * 1000)
+        heavy.update(report["heavy"])
+
+    print(f"[BENCH] екран: {args.mode or 'welcome'}, прогонів: {args.runs}")
+    for name, values in (("import streamlit", streamlit_ms), ("перший екран", paint_ms), ("усього", total_ms)):
+        print(f"[BENCH] {name}: медіана {statistics.median(values):.0f} мс, макс {max(values):.0f} мс")
+    print(f"[BENCH] важкі модулі: {', '.join(sorted(heavy)) or 'нема'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# ===============================
+# ТЕСТИ МАШИНИ СТАНІВ КІМНАТИ
+# ===============================
+# room_state — чисті функції над dict кімнати, тож тут ні Streamlit, ні Firestore.
+# Перевірку версії (оптимістичний перехід) ганяємо на MemoryRoomStore —
+# він робить те саме, що транзакція в room_ops, тільки під замком.
+#
+#   python -m pytest -q test_room_state.py
+
+import time
+
+import room_state
+from memory_store import MemoryRoomStore
+
+
+def lobby_room(**fields):
+    data = {"host": "Оля", "players": ["Оля", "Петро"], "state": "lobby",
+            "total_rounds": 3, "current_round": 1, "explainer": "", "listener": "", "version": 0}
+    data.update(fields)
+    return data
+
+
+def playing_room(**fields):
+    return lobby_room(state="playing", **fields)
+
+
+def test_phases():
+    now = time.time()
+    assert room_state.phase(lobby_room()) == room_state.LOBBY
+    assert room_state.phase(playing_room()) == room_state.TURN_PENDING
+    assert room_state.phase(playing_room(explainer="Оля", t_end=now + 30), now) == room_state.TURN_ACTIVE
+    assert room_state.phase(playing_room(explainer="Оля", t_end=now - 1), now) == room_state.TURN_OVER
+    assert room_state.phase(playing_room(current_round=4)) == room_state.FINISHED
+
+
+def test_start_game_only_from_lobby():
+    assert room_state.start_game(lobby_room()) == {"state": "playing"}
+    assert room_state.start_game(playing_room()) is None
+
+
+def test_start_turn_writes_only_changed_fields():
+    t_end = time.time() + 60
+    assert room_state.start_turn(playing_room(), "Оля", "Петро", t_end) == {
+        "explainer": "Оля", "listener": "Петро", "t_end": t_end}
+
+
+def test_start_turn_rejected_while_someone_explains():
+    data = playing_room(explainer="Оля", listener="Петро", t_end=time.time() + 60)
+    assert room_state.start_turn(data, "Петро", "Оля", time.time() + 60) is None
+    assert room_state.start_turn(lobby_room(), "Оля", "Петро", time.time() + 60) is None
+
+
+def test_end_turn_moves_to_next_round():
+    data = playing_room(explainer="Оля", listener="Петро", t_end=time.time() - 1, current_round=2)
+    assert room_state.end_turn(data) == {
+        "explainer": "", "listener": "", "t_end": None, "current_round": 3}
+
+
+def test_end_turn_twice_is_noop():
+    data = playing_room(explainer="Оля", listener="Петро", t_end=time.time() - 1)
+    data.update(room_state.end_turn(data))
+    assert room_state.end_turn(data) is None
+    assert room_state.end_turn(lobby_room(explainer="Оля")) is None
+
+
+def test_turn_authority():
+    assert room_state.turn_authority("Оля", ["Петро", "Оля"]) == "Оля"
+    assert room_state.turn_authority("Оля", ["Петро", "Іра"]) == "Петро"
+    assert room_state.turn_authority("Оля", []) == "Оля"
+
+
+def test_stale_version_is_rejected():
+    store = MemoryRoomStore()
+    room_id = store.create_room(playing_room())
+    deal = lambda deck: (["Пудж"], deck)
+
+    # Двоє натиснули "ПОЧАТИ ХІД" з тієї самої версії — пройде лише перший
+    assert store.start_turn(room_id, 0, "Оля", "Петро", deal, time.time() + 60)
+    assert not store.start_turn(room_id, 0, "Петро", "Оля", deal, time.time() + 60)
+
+    data, _ = store.get_room(room_id)
+    assert (data["explainer"], data["version"]) == ("Оля", 1)
+
+    # Закрити хід можна лише з актуальною версією, і лише один раз
+    assert not store.end_turn(room_id, 0)
+    assert store.end_turn(room_id, 1)
+    assert not store.end_turn(room_id, 1)
+
+    data, _ = store.get_room(room_id)
+    assert (data["explainer"], data["current_round"], data["version"]) == ("", 2, 2)
@@ -0,0 +1,69 @@
+# ===============================
+# ПАЧКА СЛІВ НА ХІД
+# ===============================
+# Раніше кожне "ВГАДАНО"/"ПРОПУСТИТИ" робило ref.update({"word": ...}) і чекало
+# на базу. Тепер хост роздає пачку слів на старті ходу, пояснювач гортає її
+# локально, а результати (вгадано/пропущено по кожному слову) летять у базу
+# одним записом — раз на FLUSH_EVERY_SEC або в кінці ходу.
+
+import time
+
+
+# Скільки слів роздаємо за раз (швидкому пояснювачу вистачає на хвилину)
+BATCH_SIZE = 20
+
+# Як часто (сек) скидати накопичені результати в базу
+FLUSH_EVERY_SEC = 5
+
+
+class TurnBatch:
+    # Локальний стан пояснювача на один хід (живе в st.session_state)
+
+    def __init__(self, t_end, words, pos=0):
+        self.t_end = t_end              # кінець ходу — він же ідентифікатор ходу
+        self.words = list(words)        # пачка слів (з таємного документа пояснювача)
+        self.pos = pos                  # яке слово з пачки зараз на екрані
+        self.asked_more = 0             # для якої довжини пачки вже просили доздати
+        self.exhausted = False          # усі слова словника в цьому ході вже були
+        self.pending = []               # результати, які ще не записані в базу
+        self.last_flush = time.time()
+
+    def current(self):
+        # Поточне слово з пачки (None — пачка скінчилась, треба доздати)
+        return self.words[self.pos] if self.pos < len(self.words) else None
+
+    def needs_more(self):
+        # Пора доздати слів (лишилось менше двох), і ще не просили для цієї пачки
+        if (self.exhausted or len(self.words) - self.pos >= 2
+                or self.asked_more == len(self.words)):
+            return False
+        self.asked_more = len(self.words)
+        return True
+
+    def add_words(self, words):
+        # Доздані слова — в кінець пачки (в базі це ArrayUnion, тож дублів там теж нема).
+        # Нових слів не прийшло — словник на цей хід вичерпано, більше не просимо
+        new = [w for w in words if w not in self.words]
+        self.words.extend(new)
+        if not new:
+            self.exhausted = True
+
+    def mark(self, word, guessed):
+        # Записуємо результат локально і переходимо до наступного слова.
+        # Повертає True, якщо пора скинути результати в базу
+        self.pending.append({"word": word, "guessed": guessed})
+        self.pos += 1
+
+        now = time.time()
+        return (now - self.last_flush >= FLUSH_EVERY_SEC
+                or self.t_end - now <= FLUSH_EVERY_SEC)   # під кінець ходу пишемо одразу
+
+    def take_pending(self):
+        # Забираємо накопичене для запису
+        pending, self.pending = self.pending, []
+        self.last_flush = time.time()
+        return pending
+
+    def restore(self, results):
+        # Запис не вдався — повертаємо результати в чергу, підуть із наступним
+        self.pending[:0] = results
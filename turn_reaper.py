@@ -0,0 +1,63 @@
+# ===============================
+# ЗАКРИТТЯ ПРОСТРОЧЕНИХ ХОДІВ
+# ===============================
+# Кінець ходу пише тільки хост (або перший онлайн-гравець, див. room_state.turn_authority).
+# Якщо в кімнаті на момент кінця ходу ніхто не відкритий — хід так і висів би.
+# Цей скрипт — заміна серверної задачі за розкладом: знаходить кімнати, де
+# t_end минув більше ніж --grace-sec тому, і закриває хід тією ж транзакцією end_turn,
+# тож з клієнтами він не конфліктує (запише лише хтось один).
+#
+# Приклад (проти локального емулятора):
+#   python turn_reaper.py --emulator localhost:8080
+#   python turn_reaper.py --emulator localhost:8080 --loop 5
+
+import argparse
+import time
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from db_client import add_db_args, connect
+from room_ops import end_turn
+
+
+def end_expired_turns(db, grace_sec=10, dry_run=False):
+    # Закриває ходи, які мали скінчитись більше ніж grace_sec тому. Повертає кількість.
+    # Числовий t_end є тільки в кімнатах з активним ходом (end_turn ставить None)
+    expired = (db.collection("rooms")
+               .where(filter=FieldFilter("t_end", "<", time.time() - grace_sec))
+               .select(["explainer", "version"])
+               .stream())
+
+    ended = 0
+    for snap in expired:
+        data = snap.to_dict()
+        if not data.get("explainer"):
+            continue
+        if dry_run or end_turn(db, snap.id, data.get("version", 0)):
+            ended += 1
+    return ended
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Закриває ходи, у яких вийшов час, а закрити їх було нікому")
+    add_db_args(parser)
+    parser.add_argument("--grace-sec", type=int, default=10,
+                        help="скільки секунд після кінця ходу чекати на хоста")
+    parser.add_argument("--loop", type=int, metavar="SEC",
+                        help="не виходити, а повторювати кожні SEC секунд")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="тільки порахувати, нічого не писати")
+    args = parser.parse_args()
+
+    db = connect(args)
+    verb = "знайдено" if args.dry_run else "закрито"
+    while True:
+        ended = end_expired_turns(db, args.grace_sec, args.dry_run)
+        print(f"[REAPER] {verb} ходів: {ended}")
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# ===============================
+# КОЛОДА СЛІВ (без повторів)
+# ===============================
+# random.choice() на маленькому словнику повертав те саме слово ще в тому ж ході.
+# Тепер кожна кімната має "колоду": перемішану перестановку індексів словника
+# і курсор. Слово береться за O(1), а перемішуємо заново тільки коли колода скінчилась.
+#
+# Стан колоди — це маленький dict {"seed", "size", "cursor"}, тому його можна
+# тримати в документі кімнати: всі клієнти з тим самим seed отримують
+# ту саму перестановку і не потребують зайвих читань.
+# Індекси — у відсортованому словнику (WordStore[i]), а не в порядку рядків
+# words.txt, тож на різних серверах з тими самими словами індекс = те саме слово.
+
+import functools
+import random
+from array import array
+
+
+@functools.lru_cache(maxsize=64)
+def _permutation(seed, size):
+    # Перестановка індексів 0..size-1 (компактний масив, а не список int-ів).
+    # Кешуємо, щоб не перемішувати заново на кожне слово
+    order = array("I", range(size))
+    random.Random(seed).shuffle(order)
+    return order
+
+
+def new_deck(size):
+    return {"seed": random.getrandbits(32), "size": size, "cursor": 0}
+
+
+def draw_word(store, deck):
+    # Бере наступне слово з колоди. Повертає (слово, новий стан колоди)
+    # deck може бути None — тоді колода створюється з нуля
+    if (deck is None
+            or deck["cursor"] >= deck["size"]   # колода скінчилась — перемішуємо заново
+            or deck["size"] > len(store)):      # словник зменшився (файл переписали) — теж
+        deck = new_deck(len(store))
+
+    index = _permutation(deck["seed"], deck["size"])[deck["cursor"]]
+    return store[index], dict(deck, cursor=deck["cursor"] + 1)
+
+
+def draw_words(store, deck, count):
+    # Пачка з count різних слів підряд з колоди. Повертає (слова, новий стан колоди).
+    # Якщо колоду перемішали посеред пачки, слова, що вже є в пачці, пропускаємо;
+    # словник менший за count — пачка теж буде меншою (повторів у ході не буде)
+    words = []
+    for _ in range(count + len(store)):
+        if len(words) >= min(count, len(store)):
+            break
+        word, deck = draw_word(store, deck)
+        if word not in words:
+            words.append(word)
+    return words, deck
@@ -0,0 +1,146 @@
+# ===============================
+# ЗБЕРЕЖЕННЯ СЛІВ У words.txt
+# ===============================
+# Раніше слово дописувалось через open("words.txt", "a") з голим except: pass.
+# Кілька сесій одночасно могли перемішати записи, а помилки тихо губились.
+#
+# Тепер words.txt — це журнал (append log):
+#   * дописуємо під файловим локом, одним write на пачку слів, з fsync;
+#   * читаємо теж під локом і лише повні рядки (можна дочитувати тільки "хвіст");
+#   * дублі прибирає компакція: пишемо чисту версію в тимчасовий файл
+#     і атомарно підміняємо ним words.txt (os.replace).
+
+import contextlib
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl            # Linux / macOS
+except ImportError:
+    fcntl = None
+    import msvcrt           # Windows
+
+
+# Скільки останніх прочитаних байтів звіряємо перед тим, як дочитувати хвіст
+# (якщо файл поправили руками посередині, offset уже не вказує на початок рядка)
+TAIL_CHECK_BYTES = 64
+
+
+def normalize(word):
+    # Ключ для порівняння слів без врахування регістру і пробілів по краях
+    return word.strip().casefold()
+
+
+class WordFile:
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock_path = filename + ".lock"   # окремий файл-лок (сам words.txt підміняється при компакції)
+        self._held = threading.local()        # скільки разів цей потік уже взяв лок
+
+    @contextlib.contextmanager
+    def locked(self):
+        # Ексклюзивний лок між усіма процесами і потоками, які пишуть у цей словник.
+        # Повторний вхід з того ж потоку не блокується (щоб обгорнути read + append разом)
+        depth = getattr(self._held, "depth", 0)
+        if depth:
+            self._held.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._held.depth = depth
+            return
+
+        with open(self.lock_path, "a+b") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            self._held.depth = 1
+            try:
+                yield
+            finally:
+                self._held.depth = 0
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def stat(self):
+        # (inode, розмір, mtime) або None, якщо файлу нема.
+        # Новий inode = файл підмінили (компакція), читати треба з нуля
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def read(self, offset=0, tail=b""):
+        # Читає слова, починаючи з байта offset. Повертає (слова, новий offset, (inode, mtime), хвіст),
+        # де хвіст — останні TAIL_CHECK_BYTES прочитаних байтів: їх передають сюди наступного разу,
+        # і якщо перед offset у файлі вже щось інше (файл правили руками) — повертаємо None.
+        # Недописаний останній рядок не чіпаємо — дочитаємо наступного разу
+        with self.locked():
+            try:
+                with open(self.filename, "rb") as f:
+                    st = os.fstat(f.fileno())
+                    f.seek(offset - len(tail))
+                    chunk = f.read()
+            except FileNotFoundError:
+                return [], 0, None, b""
+
+        if not chunk.startswith(tail):
+            return None
+        chunk = chunk[len(tail):]
+
+        end = chunk.rfind(b"\n") + 1
+        # З нуля читаємо поблажливо (битий байт у файлі не має класти весь словник),
+        # а хвіст — суворо: помилка декодування там означає, що offset уже не той
+        lines = chunk[:end].decode("utf-8", errors="strict" if offset else "replace").splitlines()
+        read_upto = (tail + chunk[:end])[-TAIL_CHECK_BYTES:]
+        return [w.strip() for w in lines if w.strip()], offset + end, (st.st_ino, st.st_mtime_ns), read_upto
+
+    def append(self, words):
+        # Дописує пачку слів одним записом. Помилки НЕ ковтаємо — хай бачить той, хто викликав
+        if not words:
+            return
+
+        data = "".join(w + "\n" for w in words).encode("utf-8")
+        with self.locked():
+            with open(self.filename, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def compact(self):
+        # Переписує файл без дублів і порожніх рядків (перше входження слова виграє).
+        # Спочатку пишемо в тимчасовий файл, потім атомарно підміняємо
+        with self.locked():
+            try:
+                with open(self.filename, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                return
+
+            seen = set()
+            words = []
+            for line in lines:
+                word = line.strip()
+                if word and normalize(word) not in seen:
+                    seen.add(normalize(word))
+                    words.append(word)
+
+            folder = os.path.dirname(os.path.abspath(self.filename))
+            fd, tmp_path = tempfile.mkstemp(prefix=".words-", suffix=".tmp", dir=folder)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as tmp:
+                    tmp.write("".join(w + "\n" for w in words))
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                os.replace(tmp_path, self.filename)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+                raise
@@ -0,0 +1,163 @@
+# ===============================
+# СЛОВНИК (один на весь процес сервера)
+# ===============================
+# Раніше кожна нова сесія читала words.txt у свій список, а перевірка на дубль
+# будувала [w.lower() for w in all_words] і шукала по ньому лінійно.
+# Тепер:
+#   * слова лежать в одному списку (рандом — O(1) по індексу);
+#   * для колоди — ще й відсортовані за normalize(): порядок рядків у words.txt
+#     на кожному сервері свій (дзеркало дописує слова, коли їх побачило),
+#     а відсортований список з тими самими словами однаковий усюди;
+#   * поруч хеш-індекс "нормалізоване слово -> позиція" (перевірка дубля — O(1));
+#   * якщо words.txt змінився на диску — дочитуємо лише новий "хвіст"
+#     (або перечитуємо з нуля, якщо файл підмінила компакція, його обрізали
+#     чи поправили руками — тоді не збігаються mtime або вже прочитаний кінець).
+
+import random
+import threading
+
+from word_file import WordFile, normalize
+
+
+# Якщо файлу немає або він пустий — дефолтний список
+DEFAULT_WORDS = [
+    "Пудж", "Бебра", "Стан", "Мід", "Рошан",
+    "Сленг", "Крінж", "Абобус", "Wezaxes", "Тільт"
+]
+
+# Скільки дублів у файлі терпимо, перш ніж запустити компакцію
+COMPACT_AFTER_DUPLICATES = 100
+
+
+class WordStore:
+
+    def __init__(self, filename="words.txt"):
+        self.file = WordFile(filename)
+        self._words = []        # самі слова (в порядку додавання)
+        self._index = {}        # normalize(слово) -> позиція в self._words
+        self._sorted = None     # ті самі слова, відсортовані за normalize() (будуємо за потреби)
+        self._stamp = None      # (inode, mtime) файлу, яким ми його прочитали
+        self._offset = 0        # до якого байта файл уже прочитаний
+        self._tail = b""        # останні прочитані байти — звіряємо перед дочитуванням
+        self._defaults = False  # чи це дефолтний список (файлу нема / він пустий)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _take(self, words):
+        # Додає в памʼять нові слова, дублі пропускає. Повертає кількість дублів
+        duplicates = 0
+        for word in words:
+            key = normalize(word)
+            if key in self._index:
+                duplicates += 1
+            else:
+                self._index[key] = len(self._words)
+                self._words.append(word)
+                self._sorted = None
+        return duplicates
+
+    def _load(self):
+        # Повне (пере)читування файлу (викликати під self._lock або з __init__)
+        self._words = []
+        self._index = {}
+        self._sorted = None
+
+        words, self._offset, self._stamp, self._tail = self.file.read()
+        duplicates = self._take(words)
+
+        # Якщо файлу немає або він пустий — дефолтний список
+        self._defaults = not self._words
+        if self._defaults:
+            self._take(DEFAULT_WORDS)
+
+        # Дублів назбиралось забагато — чистимо файл (підміна файлу = новий inode,
+        # тож наступний _refresh сам перечитає його з нуля)
+        if duplicates >= COMPACT_AFTER_DUPLICATES:
+            self.file.compact()
+
+    def _refresh(self):
+        # Перевіряємо файл на диску (інший процес / компакція / руками)
+        st = self.file.stat()
+        if st is None:
+            if not self._defaults:
+                self._load()
+            return
+
+        ino, size, mtime = st
+        if self._stamp is None or ino != self._stamp[0] or size < self._offset:
+            # Файл підмінили або обрізали — читаємо з нуля
+            self._load()
+        elif size > self._offset:
+            # Файл дописали — читаємо лише хвіст
+            try:
+                result = self.file.read(self._offset, self._tail)
+            except UnicodeDecodeError:
+                result = None
+            if result is None or result[2] is None or result[2][0] != ino:
+                # Файл правили посередині (offset уже не на межі рядка)
+                # або між stat і read його встигли підмінити — тоді з нуля
+                self._load()
+                return
+            words, self._offset, self._stamp, self._tail = result
+            self._defaults = False
+            self._take(words)
+        elif mtime != self._stamp[1]:
+            # Той самий розмір, але файл змінювали (поправили слово руками) — з нуля
+            self._load()
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._words)
+
+    def __contains__(self, word):
+        with self._lock:
+            self._refresh()
+            return normalize(word) in self._index
+
+    def __getitem__(self, i):
+        # Слово за індексом у відсортованому порядку (для колоди слів, див. word_deck.py):
+        # колода кімнати спільна для всіх серверів, тож індекс має значити те саме слово
+        with self._lock:
+            self._refresh()
+            if self._sorted is None:
+                self._sorted = sorted(self._words, key=normalize)
+            return self._sorted[i]
+
+    def random(self):
+        # Випадкове слово за O(1)
+        with self._lock:
+            self._refresh()
+            return self._words[random.randrange(len(self._words))]
+
+    def add_many(self, words):
+        # Додає пачку слів одним записом у файл. Повертає ті, яких ще не було
+        # (без врахування регістру). Якщо файл записати не вдалось — OSError.
+        # Файловий лок тримаємо на всю перевірку + запис, щоб інший процес
+        # не дописав те саме слово між ними
+        with self._lock, self.file.locked():
+            self._refresh()
+
+            new_words = []
+            new_keys = set()
+            for word in words:
+                key = normalize(word)
+                if key not in self._index and key not in new_keys:
+                    new_keys.add(key)
+                    new_words.append(word)
+
+            if not new_words:
+                return []
+
+            # Якщо грали на дефолтному списку — пишемо у файл і його, інакше він загубиться
+            self.file.append((self._words if self._defaults else []) + new_words)
+
+            # Спершу файл, потім памʼять: якщо запис впав, словник лишається як був.
+            # Наш же запис дочитає наступний _refresh (слова вже в індексі — пропустяться)
+            self._defaults = False
+            self._take(new_words)
+            return new_words
+
+    def add(self, word):
+        # Повертає False, якщо таке слово вже є (без врахування регістру)
+        return bool(self.add_many([word]))
@@ -0,0 +1,108 @@
+# ===============================
+# СПІЛЬНИЙ СЛОВНИК У FIRESTORE
+# ===============================
+# Слова з "➕ Додати своє слово" раніше жили тільки у words.txt одного сервера.
+# Тепер вони ще й летять у колекцію "words", а кожен сервер тримає локальне
+# дзеркало (WordStore) і підтягує лише нові слова — ті, що додані після
+# останнього побаченого added_at (курсор), а не весь словник щоразу.
+
+import hashlib
+import threading
+import time
+
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import firestore
+
+from word_file import normalize
+
+
+# Як часто (сек) один сервер питає базу про нові слова
+SYNC_EVERY_SEC = 10
+
+# Скільки документів тягнемо за один запит
+PAGE_SIZE = 500
+
+
+def word_doc_id(word):
+    # ID документа = хеш нормалізованого слова: дублі між серверами відсікає сама база
+    # (і не треба думати про "/" та інші заборонені в ID символи)
+    return hashlib.sha1(normalize(word).encode("utf-8")).hexdigest()
+
+
+class WordMirror:
+
+    def __init__(self, db, store):
+        self.db = db
+        self.store = store          # локальний WordStore, куди складаємо нові слова
+        self._cursor = None         # останній побачений документ (added_at + id)
+        self._last_sync = 0
+        self._outbox = []           # слова, які ще не вдалося відправити в базу
+        self._lock = threading.Lock()
+
+    def sync(self, force=False):
+        # Дотягує нові слова з бази. Не частіше, ніж раз на SYNC_EVERY_SEC,
+        # і тільки один потік на процес — решта сесій просто йдуть далі
+        if not force and time.time() - self._last_sync < SYNC_EVERY_SEC:
+            return 0
+        if not self._lock.acquire(blocking=False):
+            return 0
+
+        try:
+            # Спершу довідправляємо те, що не пролізло минулого разу
+            self._flush_outbox()
+
+            pulled = 0
+            while True:
+                query = (self.db.collection("words")
+                         .order_by("added_at")
+                         .order_by("__name__")
+                         .limit(PAGE_SIZE))
+                if self._cursor is not None:
+                    query = query.start_after(self._cursor)
+
+                try:
+                    docs = list(query.stream())
+                except Exception:
+                    break       # база недоступна — граємо на тому, що є локально, спробуємо пізніше
+                if not docs:
+                    break
+
+                try:
+                    self.store.add_many([d.get("word") for d in docs])
+                except OSError as e:
+                    # words.txt не записався (диск, права, лок) — курсор не рухаємо,
+                    # ці ж слова дотягнемо наступного разу
+                    print(f"[WORDS] не вдалося зберегти слова з бази: {e!r}")
+                    break
+                self._cursor = docs[-1]
+                pulled += len(docs)
+
+                if len(docs) < PAGE_SIZE:
+                    break
+
+            self._last_sync = time.time()
+            return pulled
+        finally:
+            self._lock.release()
+
+    def publish(self, word):
+        # Кладе нове слово в спільний словник. Якщо база зараз недоступна —
+        # слово чекає в черзі і піде в базу на наступному sync()
+        with self._lock:
+            self._outbox.append(word)
+            self._flush_outbox()
+
+    def _flush_outbox(self):
+        # Викликати під self._lock
+        while self._outbox:
+            word = self._outbox[0]
+            try:
+                self.db.collection("words").document(word_doc_id(word)).create({
+                    "word": word,
+                    "added_at": firestore.SERVER_TIMESTAMP
+                })
+            except AlreadyExists:
+                pass            # хтось (інший сервер) уже додав таке слово — теж ок
+            except Exception:
+                return          # мережа / квота — спробуємо пізніше
+            self._outbox.pop(0)
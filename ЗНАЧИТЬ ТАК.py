@@ -5,11 +5,18 @@
 import streamlit as st          # Основна бібліотека для веб-інтерфейсу
 import random                  # Для рандому (слова, коди, перемішування)
 import time                    # Для таймерів / затримок (може знадобитись далі)
-import os                      # Робота з файлами та файловою системою
 import json                    # Для парсингу JSON (ключі доступу)
-import string                  # Набір букв і цифр (для генерації коду кімнати)
-from google.cloud import firestore             # Firestore (база даних)
-from google.oauth2 import service_account      # Авторизація Google сервісів
+import os                      # Змінні оточення (вибір сховища кімнат)
+import uuid                    # Мітка сесії для замірів
+from countdown import countdown                # Таймер ходу, який тікає в браузері
+from room_store import StoreUnavailable         # База не відповідає (таймаут / запобіжник)
+from room_writes import RoomWrites              # Записи в кімнату: тільки змінені поля, один update на rerun
+import room_state                               # Стани кімнати і переходи між ними
+from word_store import WordStore               # Словник з індексом (один на процес)
+from word_deck import draw_word, draw_words    # Колода слів без повторів
+from turn_batch import TurnBatch, BATCH_SIZE   # Пачка слів на хід (пояснювач гортає локально)
+from op_counter import count_ops, set_context  # Лічильник читань/записів Firestore
+from rerun_metrics import Metrics, RerunTimer  # Заміри фаз rerun
 
 
 # ===============================
@@ -25,225 +32,140 @@ st.set_page_config(
 
 
 # ===============================
-# 2. СТИЛІЗАЦІЯ (CSS)
+# ЗАМІРИ (час фаз rerun + операції з базою)
 # ===============================
 
-# Вставка кастомного CSS для всього інтерфейсу
-st.markdown("""
-    <style>
-
-    /* Центруємо кнопки Streamlit */
-    .stButton { display: flex; justify-content: center; }
-
-    /* Стиль самих кнопок */
-    .stButton>button { 
-        width: 100%;                 /* Кнопка на всю ширину */
-        height: 4.5em;               /* Висота кнопки */
-        font-size: 24px !important;  /* Великий текст */
-        font-weight: bold; 
-        border-radius: 15px; 
-        margin-bottom: 10px; 
-        text-transform: uppercase;   /* Всі літери великі */
-    }
-
-    /* Центрування всіх заголовків і тексту */
-    h1, h2, h3, p { text-align: center !important; }
-
-    /* Блок зі словом (у грі) */
-    .word-box { 
-        font-size: 42px; 
-        text-align: center; 
-        font-weight: bold; 
-        color: #f9e2af; 
-        background-color: #313244; 
-        padding: 50px; 
-        border-radius: 20px; 
-        border: 3px solid #89b4fa; 
-        margin: 20px 0; 
-    }
-
-    /* Блок дисклеймера */
-    .disclaimer-box {
-        text-align: center; 
-        background-color: #45475a; 
-        padding: 25px; 
-        border-radius: 15px; 
-        border: 2px solid #f38ba8;
-    }
-
-    /* Екран очікування / лобі */
-    .waiting-screen {
-        background-color: #1e1e2e; 
-        padding: 50px; 
-        border-radius: 25px;
-        border: 3px dashed #fab387; 
-        color: #fab387; 
-        text-align: center;
-    }
-
-    /* Попереджувальний текст */
-    .warning-text {
-        color: #f38ba8; 
-        font-weight: bold; 
-        font-size: 28px; 
-        border: 2px solid #f38ba8; 
-        padding: 10px; 
-        border-radius: 10px;
-        margin-top: 20px; 
-        text-transform: uppercase;
-    }
-
-    /* ---------------------------
-       ДИЗАЙН ПЛИТОК РЕЖИМІВ
-       --------------------------- */
-
-    .mode-selection {
-        padding: 30px; 
-        border-radius: 20px; 
-        background: #cdd6f4;         /* Світлий фон */
-        border: 3px solid #89b4fa; 
-        margin-bottom: 20px;
-        transition: 0.3s;            /* Анімація ховера */
-        cursor: pointer;
-        display: block;
-        width: 100%;
-        text-decoration: none !important;
-        color: #000000 !important;   /* Примусово чорний текст */
-    }
-
-    /* Ефект наведення */
-    .mode-selection:hover {
-        background: #bac2de;
-        border-color: #fab387;
-        transform: scale(1.02);
-    }
-
-    /* Примусово чорний текст всередині плиток */
-    .mode-selection h3, 
-    .mode-selection p, 
-    .mode-selection span { 
-        color: #000000 !important; 
-        margin-top: 0; 
-        text-decoration: none !important;
-    }
-
-    /* Щоб посилання не міняли колір */
-    a:link, a:visited, a:hover, a:active {
-        text-decoration: none !important;
-        color: inherit !important;
-    }
-
-    /* Кнопка фідбеку */
-    .feedback-btn {
-        background-color: #38bdf8 !important;
-        border: none !important;
-        color: white !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-
-# Додатковий CSS для коректної ширини контейнерів
-st.markdown("""
-    <style>
-    div[data-testid="stVerticalBlock"] > div.stElementContainer {
-        width: 100%;
-        margin-bottom: 10px;
-    }
-
-    div.stButton {
-        width: 100%;
-        display: flex;  
-        justify-content: center;
-    }
-
-    div.stButton > button {
-        width: 100%;
-    }      
-    </style>
-""", unsafe_allow_html=True)
+# Одні заміри на весь процес сервера
+@st.cache_resource
+def get_metrics():
+    return Metrics("metrics.jsonl")
 
 
-# ===============================
-# ДОПОМІЖНІ ФУНКЦІЇ
-# ===============================
+metrics = get_metrics()
 
-def generate_room_code():
-    # Генеруємо 4 великі літери
-    letters = ''.join(random.choices(string.ascii_uppercase, k=4))
+# Таймер фаз — свій у кожної сесії
+if "rerun_timer" not in st.session_state:
+    st.session_state.rerun_timer = RerunTimer(metrics)
+    st.session_state.session_tag = uuid.uuid4().hex[:8]
+rerun_timer = st.session_state.rerun_timer
 
-    # Генеруємо 2 цифри
-    digits = ''.join(random.choices(string.digits, k=2))
+rerun_timer.start(st.session_state.get("game_state", "welcome"), "css")
+# Усі операції з базою в цьому rerun записуються на нашу сесію і кімнату
+set_context(session=st.session_state.session_tag, room=st.session_state.get("room_id"))
+metrics.maybe_flush()
 
-    # Об'єднуємо літери й цифри в список
-    code_list = list(letters + digits)
 
-    # Перемішуємо символи
-    random.shuffle(code_list)
+# ===============================
+# 2. СТИЛІЗАЦІЯ (CSS)
+# ===============================
 
-    # Повертаємо код як рядок
-    return ''.join(code_list)
+# Стилі лежать у static/style.css і віддаються статикою Streamlit
+# (enableStaticServing у .streamlit/config.toml): у кожному rerun летить
+# лише короткий <link>, а сам файл браузер бере з кешу
+st.markdown('<link rel="stylesheet" href="app/static/style.css">', unsafe_allow_html=True)
 
 
-# Кешуємо підключення до бази, щоб не створювалось щоразу
+# ===============================
+# ДОПОМІЖНІ ФУНКЦІЇ
+# ===============================
+
+
+# Кешуємо підключення до бази, щоб не створювалось щоразу.
+# Firestore (gRPC + google-auth) імпортуємо тут, а не на початку файлу:
+# welcome, туторіал та IRL до бази не ходять і не мають платити за ці імпорти
 @st.cache_resource
 def get_db():
     try:
+        from google.cloud import firestore
+        from google.oauth2 import service_account
+        from db_policy import CircuitBreaker, apply_policy
+
         # Беремо JSON-ключ із secrets
         key_dict = json.loads(st.secrets["textkey"])
 
         # Створюємо креденшали
         creds = service_account.Credentials.from_service_account_info(key_dict)
 
-        # Повертаємо клієнт Firestore
-        return firestore.Client(credentials=creds)
-    except:
-        # Якщо щось пішло не так — просто None
+        # Повертаємо клієнт Firestore: з дедлайнами, повторами і запобіжником (db_policy.py)
+        # та з лічильником операцій
+        client = firestore.Client(credentials=creds)
+        apply_policy(client, CircuitBreaker())
+        count_ops(client, metrics.ops)
+        return client
+    except Exception as e:
+        # Нема ключа чи бібліотек — граємо без Firestore, але кажемо чому
+        print(f"[DB] Firestore не підключено: {e!r}")
         return None
 
 
-# Підключення до бази
-db = get_db()
+# Що показати, коли база не відповідає (екран лишається на останньому відомому стані)
+DB_DOWN_MSG = "📡 База зараз не відповідає — пробуємо ще раз..."
 
+# Через скільки секунд повторювати запис, який не пройшов
+DB_RETRY_SEC = 2
 
-def load_words():
-    filename = "words.txt"
 
-    # Перевіряємо, чи існує файл
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            # Зчитуємо всі непорожні рядки
-            words = [line.strip() for line in f if line.strip()]
+# Сховище кімнат — одне на весь процес сервера (спільне для всіх сесій):
+#   * ROOMS_DB=rooms.db — локальний SQLite (один сервер, кімнати переживають перезапуск);
+#   * інакше Firestore, а якщо його нема — памʼять процесу (гравці мають бути на цьому ж сервері)
+@st.cache_resource
+def get_room_store():
+    if os.environ.get("ROOMS_DB"):
+        from sqlite_store import SqliteRoomStore
+        return SqliteRoomStore(os.environ["ROOMS_DB"])
 
-            # Якщо слова є — повертаємо їх
-            if words:
-                return words
+    db = get_db()
+    if db:
+        from firestore_store import FirestoreRoomStore
+        return FirestoreRoomStore(db, ops=metrics.ops)
 
-    # Якщо файлу немає або він пустий — дефолтний список
-    return [
-        "Пудж", "Бебра", "Стан", "Мід", "Рошан",
-        "Сленг", "Крінж", "Абобус", "Wezaxes", "Тільт"
-    ]
+    from memory_store import MemoryRoomStore
+    return MemoryRoomStore()
 
 
-def append_word_to_file(word):
-    try:
-        # Додаємо слово в кінець файлу
-        with open("words.txt", "a", encoding="utf-8") as f:
-            f.write(word + "\n")
-    except:
-        # Якщо не вдалось — мовчки ігноруємо
-        pass
+rerun_timer.phase("words")
+
+
+# Словник — один на весь процес: читається раз, а не в кожній сесії.
+# Сам перечитає words.txt, якщо файл змінився на диску
+@st.cache_resource
+def get_word_store():
+    return WordStore("words.txt")
+
+
+# Дзеркало спільного словника з Firestore — теж одне на процес
+@st.cache_resource
+def get_word_mirror():
+    db = get_db()
+    if not db:
+        return None
+
+    from word_sync import WordMirror
+    return WordMirror(db, word_store)
+
+
+word_store = get_word_store()
+
+# До бази підключаємось тільки в Discord-режимі: там кімнати і там же
+# дотягуємо слова, які додали на інших серверах (тільки нові, не частіше ніж раз на 10 с)
+rerun_timer.phase("db")
+room_store = None
+if st.session_state.get("game_mode") == "discord":
+    room_store = get_room_store()
+
+    word_mirror = get_word_mirror()
+    if word_mirror:
+        rerun_timer.phase("word_sync")
+        word_mirror.sync()
+
+
+rerun_timer.phase("screen")
 
 
 # ===============================
 # ІНІЦІАЛІЗАЦІЯ SESSION STATE
 # ===============================
 
-# Усі слова гри
-if 'all_words' not in st.session_state:
-    st.session_state.all_words = load_words()
-
 # Дані для повідомлень (текст + тип)
 if 'msg_data' not in st.session_state:
     st.session_state.msg_data = {"text": None, "type": None}
@@ -262,6 +184,30 @@ if 'game_state' not in st.session_state:
     st.session_state.current_round = 1           # Номер раунду
 
 
+# Активні кімнати (для debug-панелі): список кодів — одним запитом і лише на кнопку,
+# а самі кімнати оновлюються раз на 5 с одним пакетним читанням (get_rooms),
+# а не запитом на кожну кімнату
+@st.fragment(run_every=5)
+def active_rooms_panel():
+    set_context(session=st.session_state.session_tag)
+    store = get_room_store()
+    try:
+        if st.button("🔄 Оновити список") or "dashboard_rooms" not in st.session_state:
+            st.session_state.dashboard_rooms = [code for code, _ in store.active_rooms(limit=20)]
+        rooms = store.get_rooms(st.session_state.dashboard_rooms)
+    except StoreUnavailable:
+        st.warning(DB_DOWN_MSG)
+        return
+
+    st.table([{
+        "код": code,
+        "стан": room_state.phase(data),
+        "хост": data.get("host", ""),
+        "гравців": len(data.get("players", [])),
+        "раунд": f"{data.get('current_round', 1)}/{data.get('total_rounds', 3)}",
+    } for code, (data, _) in rooms.items() if data is not None])
+
+
 # ===============================
 # САЙДБАР
 # ===============================
@@ -276,6 +222,21 @@ with st.sidebar:
     )
     st.markdown("---")
 
+    # Панель замірів — тільки з ?debug=1 в адресі
+    if st.query_params.get("debug") == "1":
+        with st.expander("🛠 Debug", expanded=True):
+            s_reads, s_writes = metrics.ops.for_session(st.session_state.session_tag)
+            st.caption(f"Сесія {st.session_state.session_tag}: читань {s_reads}, записів {s_writes}")
+            if st.session_state.get("room_id"):
+                r_reads, r_writes = metrics.ops.for_room(st.session_state.room_id)
+                st.caption(f"Кімната {st.session_state.room_id}: читань {r_reads}, записів {r_writes}")
+            # середній і найдовший час кожної фази rerun на цьому екрані (мс)
+            st.caption(f"Екран: {st.session_state.game_state}")
+            st.table(metrics.phases(st.session_state.game_state))
+
+            if st.checkbox("Активні кімнати"):
+                active_rooms_panel()
+
 
 # ===============================
 # ОБРОБКА URL-ПАРАМЕТРІВ
@@ -290,6 +251,162 @@ if "mode" in params:
     st.session_state.game_state = "setup"         # Переходимо до сетапу
     st.query_params.clear()                       # Чистимо URL
     st.rerun()                                    # Перезапуск додатку
+
+
+# ===============================
+# ЖИВІ ЧАСТИНИ ЕКРАНУ (фрагменти)
+# ===============================
+# Фрагмент перезапускає лише себе (за таймером run_every або від своїх кнопок),
+# а сайдбар, заголовки та решта екрана не перераховуються і не летять у браузер знову.
+# Увесь скрипт (st.rerun()) перезапускаємо тільки тоді, коли змінився сам екран.
+
+
+# Фрагменти і колбеки кнопок Streamlit ганяє в новому потоці, а контекст лічильника
+# операцій (op_counter) живе в потоці — тому кожен з них виставляє його собі сам
+def track_ops(room_id):
+    set_context(session=st.session_state.session_tag, room=room_id)
+
+
+# Сітка гравців у лобі + налаштування гри (для не-хостів)
+@st.fragment(run_every=1)
+def lobby_live(room_id, my_name, is_host):
+    track_ops(room_id)
+    data, _ = room_store.subscribe(room_id).get()
+
+    # Гру запустили / кімнату видалили / хтось зайшов чи вийшов — перемальовуємо весь екран
+    # (сайдбар зі списком гравців і тости — поза фрагментом)
+    if (data is None or room_state.phase(data) != room_state.LOBBY
+            or data.get("players", []) != st.session_state.get("old_players")):
+        st.rerun()
+
+    # Кажемо, що ми ще тут (пише в базу не частіше ніж раз на 15 с), і дивимось, хто онлайн
+    room_store.heartbeat(room_id, my_name)
+    online_players = room_store.online(room_id, data["players"])
+
+    st.write("### Гравці в лобі:")
+
+    # Відображення гравців у 3 колонки
+    cols = st.columns(3)
+    for i, p in enumerate(data["players"]):
+        # хто давно не подавав ознак життя — з позначкою офлайн
+        label = f"👤 {p}" if p in online_players else f"💤 {p} (офлайн)"
+        cols[i % 3].button(label, disabled=True, key=f"p_{i}")
+
+    if not is_host:
+        # Повідомлення для не-хостів (хост міняє налаштування — бачимо одразу)
+        st.warning("🕒 Очікуємо, поки хост розбереться в кнопках...")
+        st.info(f"📊 Раундів: {data.get('total_rounds', 3)} | ⏱ Час: {data.get('duration', 60)}с")
+
+
+# Стежимо за кімнатою під час гри: поки нічого не змінилось — тільки heartbeat,
+# змінилось (хід стартував/закінчився, нові бали) — перемальовуємо екран.
+# retry_at — коли повторити запис, який не пройшов (база не відповідала):
+# перемальовуємо не раніше цього часу, щоб не ганяти rerun-и в циклі, поки база лежить.
+# closer — хто мав закрити хід, коли екран малювали востаннє
+@st.fragment(run_every=1)
+def room_watch(room_id, my_name, seen_version, retry_at=None, closer=None):
+    track_ops(room_id)
+    room_store.heartbeat(room_id, my_name)
+    data, version = room_store.subscribe(room_id).get()
+    if version != seen_version or (retry_at is not None and time.time() >= retry_at):
+        st.rerun()
+
+    # Час вийшов, а той, хто мав закрити хід, зник (закрив вкладку): щойно він стане
+    # офлайн, закривати випадає нам — перемальовуємо екран, end_turn там
+    if data and closer != my_name and room_state.phase(data) == room_state.TURN_OVER:
+        online_players = room_store.online(room_id, data.get("players", []))
+        if my_name == room_state.turn_authority(data.get("host"), online_players):
+            st.rerun()
+
+
+# Рахунок гравців під час гри
+@st.fragment(run_every=2)
+def scoreboard(room_id):
+    track_ops(room_id)
+    data, _ = room_store.subscribe(room_id).get()
+    if data is None:
+        return
+    with st.expander("📊 Рахунок"):
+        for n, s in sorted(data.get("scores", {}).items(), key=lambda x: x[1], reverse=True):
+            st.write(f"{n}: {s}")
+
+
+# Кнопки пояснювача: результат пишемо в колбеку (до того, як фрагмент перемалюється),
+# тож після кліку фрагмент одразу показує наступне слово
+def mark_word(room_id, my_name, guessed):
+    track_ops(room_id)
+    batch = st.session_state.turn_batch
+    word = batch.current()
+    if word is not None and batch.mark(word, guessed=guessed):
+        flush_turn(room_id, my_name)
+
+
+# Скидає в базу результати пояснювача, які ще не записані (бали — атомарним Increment на сервері).
+# False — база не відповіла; результати лишаються в черзі і підуть із наступним записом
+def flush_turn(room_id, my_name):
+    batch = st.session_state.get("turn_batch")
+    if batch is None or not batch.pending:
+        return True
+    results = batch.take_pending()
+    try:
+        room_store.flush_results(room_id, my_name, results)
+        return True
+    except StoreUnavailable:
+        batch.restore(results)
+        return False
+
+
+# Слово і кнопки пояснювача: кліки перезапускають лише цей фрагмент
+@st.fragment
+def explainer_panel(room_id, my_name, t_end):
+    track_ops(room_id)
+    # локальний стан пачки на цей хід (новий t_end — новий хід).
+    # Слова читаємо з таємного документа один раз на хід; якщо вкладку перезавантажили —
+    # продовжуємо з того слова, до якого вже дописано результати
+    batch = st.session_state.get("turn_batch")
+    if batch is None or batch.t_end != t_end:
+        try:
+            secret = room_store.load_secret(room_id, my_name)
+        except StoreUnavailable:
+            st.warning(DB_DOWN_MSG)
+            secret = None
+        if not secret or secret.get("t_end") != t_end:
+            st.info("⏳ Отримуємо слова...")
+            time.sleep(0.5)
+            st.rerun()
+        # хвіст попереднього ходу, якщо його ще не дописали, — до того, як пачку замінимо
+        flush_turn(room_id, my_name)
+        batch = st.session_state.turn_batch = TurnBatch(
+            t_end, secret.get("words", []), pos=len(secret.get("log", [])))
+
+    # пачка майже скінчилась — доздаємо ще одну (один запис на BATCH_SIZE слів)
+    if batch.needs_more():
+        try:
+            batch.add_words(room_store.deal_more(room_id, my_name,
+                                                 lambda deck: draw_words(word_store, deck, BATCH_SIZE)))
+        except StoreUnavailable:
+            batch.asked_more = 0        # попросимо ще раз на наступному кліку
+
+    word = batch.current()
+    if word is None:
+        if batch.exhausted:
+            # у словнику менше слів, ніж устигли пояснити за хід — чекаємо кінця таймера
+            st.info("🏁 Слова в словнику скінчились! Доповнюйте словник у режимі IRL (➕ Додати своє слово).")
+        else:
+            # база не віддала слів — пробуємо ще раз на кліку (перезапускає лише цей фрагмент)
+            st.warning(DB_DOWN_MSG)
+            st.button("🔄 Ще раз", key="retry_words")
+        return
+
+    st.markdown(f'<div class="word-box">{word.upper()}</div>', unsafe_allow_html=True)  # показ слова
+
+    c1, c2 = st.columns(2)  # дві кнопки: вгадано / пропустити
+    # кнопки гортають пачку локально, а в базу результати летять пачкою
+    # (раз на кілька секунд, під кінець ходу — одразу)
+    c1.button("✅ ВГАДАНО", use_container_width=True, on_click=mark_word, args=(room_id, my_name, True))
+    c2.button("❌ ПРОПУСТИТИ", use_container_width=True, on_click=mark_word, args=(room_id, my_name, False))
+
+
 # ===============================
 # ЕКРАНИ ГРИ (STATE MACHINE)
 # ===============================
@@ -471,17 +588,10 @@ elif st.session_state.game_state == "setup":
                 # Перевірка, що нік введений
                 if my_name:
 
-                    # Генеруємо ID кімнати
-                    r_id = generate_room_code()
-
-                    # Зберігаємо ID та ім'я в session_state
-                    st.session_state.room_id = r_id
-                    st.session_state.my_name = my_name
-
-                    # Якщо Firestore підключений
-                    if db:
-                        # Створюємо документ кімнати
-                        db.collection("rooms").document(r_id).set({
+                    # Створюємо кімнату під вільним кодом
+                    # (create-if-absent: чужу кімнату з таким самим кодом не перезапишемо)
+                    try:
+                        r_id = room_store.create_room({
                             "host": my_name,                 # Хост кімнати
                             "players": [my_name],           # Список гравців
                             "scores": {my_name: 0},         # Очки
@@ -491,8 +601,16 @@ elif st.session_state.game_state == "setup":
                             "current_round": 1,             # Поточний раунд
                             "explainer": "",                # Пояснює
                             "listener": "",                 # Вгадує
-                            "word": ""                      # Поточне слово
+                            "version": 0                    # Версія стану (для транзакцій)
                         })
+                    except StoreUnavailable:
+                        r_id = None
+                        st.error(DB_DOWN_MSG)
+
+                    if r_id:
+                        # Зберігаємо ID та ім'я в session_state
+                        st.session_state.room_id = r_id
+                        st.session_state.my_name = my_name
 
                         # Переходимо в синхронізоване лобі
                         st.session_state.game_state = "sync_lobby"
@@ -525,36 +643,38 @@ elif st.session_state.game_state == "setup":
                 # Перевірка, що є і нік, і код
                 if my_name and enter_code:
 
-                    # Якщо Firestore доступний
-                    if db:
-                        ref = db.collection("rooms").document(enter_code)
-                        doc = ref.get()
-
-                        # Якщо кімната існує
-                        if doc.exists:
-                            data = doc.to_dict()
-
-                            # Зберігаємо локально
-                            st.session_state.room_id = enter_code
-                            st.session_state.my_name = my_name
-
-                            # Якщо гравець ще не в кімнаті
-                            if my_name not in data["players"]:
-                                data["players"].append(my_name)
-                                data["scores"][my_name] = 0
-
-                                # Оновлюємо дані в Firestore
-                                ref.update({
-                                    "players": data["players"],
-                                    "scores": data["scores"]
-                                })
-
+                    # Читаємо через сховище (у Firestore — спільний кеш: якщо вся тусовка
+                    # заходить одночасно, в базу піде один запит на всіх)
+                    try:
+                        data, _ = room_store.get_room(enter_code)
+                    except StoreUnavailable:
+                        data = False
+                        st.error(DB_DOWN_MSG)
+
+                    # Якщо кімната існує
+                    if data:
+
+                        # Зберігаємо локально
+                        st.session_state.room_id = enter_code
+                        st.session_state.my_name = my_name
+
+                        # Якщо гравець ще не в кімнаті — дописуємо тільки себе
+                        # (ArrayUnion + одне поле scores, а не весь список і всю мапу)
+                        writes = RoomWrites(room_store, enter_code, data)
+                        if my_name not in data["players"]:
+                            writes.add_player(my_name)
+                            writes.set_score(my_name, 0)
+                        try:
+                            writes.commit()
+                        except StoreUnavailable:
+                            st.error(DB_DOWN_MSG)
+                        else:
                             # Переходимо в лобі
                             st.session_state.game_state = "sync_lobby"
                             st.rerun()
-                        else:
-                            # Кімната не знайдена
-                            st.error("❌ Код невірний!")
+                    elif data is None:
+                        # Кімната не знайдена
+                        st.error("❌ Код невірний!")
                 else:
                     # Не введені обовʼязкові поля
                     st.error("Введи нік та код!")
@@ -626,83 +746,95 @@ elif st.session_state.game_state == "setup":
                 # Переходимо до гри
                 st.session_state.game_state = "playing_irl"
                 st.rerun()
-# --- ДОДАВАННЯ СЛІВ ---
-st.divider()  # візуальний роздільник, чисто щоб не було каші на сторінці
-
-with st.expander("➕ Додати своє слово"):  # згортаний блок для додавання слів
-    # показує кількість слів, які зараз є у словнику (береться із session_state)
-    st.info(f"Зараз у словнику слів: {len(st.session_state.all_words)}")
-
-    # поле введення слова
-    # key потрібен, щоб Streamlit знав, що це саме цей інпут
-    new_word_raw = st.text_input("Введи слово:", key="input_field")
-
-    # кнопка, яка тригерить логіку додавання
-    if st.button("ДОДАТИ В СЛОВНИК"):
-
-        # прибираємо пробіли по краях + робимо першу літеру великою
-        word = new_word_raw.strip().capitalize()
-
-        # те саме слово, але в lower — для перевірки на дубль
-        low_word = word.lower()
-
-        # список усіх слів у lower, щоб порівнювати без врахування регістру
-        existing_low = [w.lower() for w in st.session_state.all_words]
-
-        # перевірка, що інпут не порожній
-        if word != "":
-            # якщо слово вже є (без врахування регістру)
-            if low_word in existing_low:
-                # записуємо повідомлення про помилку в session_state
-                st.session_state.msg_data = {
-                    "text": "Таке слово вже є!",
-                    "type": "error"
-                }
-            else:
-                # додаємо слово в список слів
-                st.session_state.all_words.append(word)
 
-                # зберігаємо останнє додане слово
-                st.session_state.last_added_word = word
 
-                # записуємо success-повідомлення
-                st.session_state.msg_data = {
-                    "text": "Слово додано!",
-                    "type": "success"
-                }
+    # --- ДОДАВАННЯ СЛІВ ---
+    st.divider()  # візуальний роздільник, чисто щоб не було каші на сторінці
+
+    with st.expander("➕ Додати своє слово"):  # згортаний блок для додавання слів
+        # показує кількість слів, які зараз є у словнику (спільному для всіх сесій)
+        st.info(f"Зараз у словнику слів: {len(word_store)}")
+
+        # поле введення слова
+        # key потрібен, щоб Streamlit знав, що це саме цей інпут
+        new_word_raw = st.text_input("Введи слово:", key="input_field")
+
+        # кнопка, яка тригерить логіку додавання
+        if st.button("ДОДАТИ В СЛОВНИК"):
+
+            # прибираємо пробіли по краях + робимо першу літеру великою
+            word = new_word_raw.strip().capitalize()
+
+            # перевірка, що інпут не порожній
+            if word != "":
+                # додаємо в словник (і у файл під локом); False — якщо таке слово вже є
+                # (без врахування регістру, перевірка по хеш-індексу)
+                try:
+                    added = word_store.add(word)
+
+                    # і в спільний словник у Firestore, щоб слово побачили всі сервери
+                    # (база підключається тут, на кліку, а не при відкритті сторінки)
+                    word_mirror = get_word_mirror() if added else None
+                    if word_mirror:
+                        word_mirror.publish(word)
+                except OSError:
+                    # файл не записався — більше не мовчимо, а кажемо гравцю
+                    added = None
+                    st.session_state.msg_data = {
+                        "text": "Не вдалося зберегти слово, спробуй ще раз!",
+                        "type": "error"
+                    }
+
+                if added is False:
+                    # записуємо повідомлення про помилку в session_state
+                    st.session_state.msg_data = {
+                        "text": "Таке слово вже є!",
+                        "type": "error"
+                    }
+                elif added:
+                    # зберігаємо останнє додане слово
+                    st.session_state.last_added_word = word
+
+                    # записуємо success-повідомлення
+                    st.session_state.msg_data = {
+                        "text": "Слово додано!",
+                        "type": "success"
+                    }
+
+                # примусовий перерендер сторінки,
+                # щоб оновились список слів і повідомлення
+                st.rerun()
 
-                # фізично дописуємо слово у файл
-                append_word_to_file(word)
+        # якщо є текст повідомлення — показуємо його
+        if st.session_state.msg_data["text"]:
+            # якщо тип success — зелений алерт
+            if st.session_state.msg_data["type"] == "success":
+                st.success(st.session_state.msg_data["text"])
+            # інакше — червоний алерт
+            else:
+                st.error(st.session_state.msg_data["text"])
 
-            # примусовий перерендер сторінки,
-            # щоб оновились список слів і повідомлення
-            st.rerun()
+        # якщо є останнє додане слово — показуємо його під формою
+        if st.session_state.last_added_word:
+            st.markdown(f"✅ Останнє: **{st.session_state.last_added_word}**")
 
-    # якщо є текст повідомлення — показуємо його
-    if st.session_state.msg_data["text"]:
-        # якщо тип success — зелений алерт
-        if st.session_state.msg_data["type"] == "success":
-            st.success(st.session_state.msg_data["text"])
-        # інакше — червоний алерт
-        else:
-            st.error(st.session_state.msg_data["text"])
 
-    # якщо є останнє додане слово — показуємо його під формою
-    if st.session_state.last_added_word:
-        st.markdown(f"✅ Останнє: **{st.session_state.last_added_word}**")
 # --- СИНХРОНІЗОВАНЕ ЛОББІ (DISCORD) ---
 elif st.session_state.game_state == "sync_lobby":
     # Заголовок з кодом кімнати
     st.title(f"🏠 Кімната: {st.session_state.room_id}")
 
-    # Посилання на документ кімнати в Firestore
-    ref = db.collection("rooms").document(st.session_state.room_id)
-    doc = ref.get()
+    # Читаємо кімнату з підписки в памʼяті, а не через ref.get()
+    rerun_timer.phase("room")
+    room_sub = room_store.subscribe(st.session_state.room_id)
+    data, room_version = room_sub.get()
+    rerun_timer.phase("screen")
+
+    # Усі записи лобі за цей rerun — одним update і тільки те, що змінилось
+    writes = RoomWrites(room_store, st.session_state.room_id, data)
 
     # Якщо кімната існує в базі
-    if doc.exists:
-        # Дістаємо всі дані кімнати
-        data = doc.to_dict()
+    if data is not None:
 
         # Поточний список гравців
         current_players = data.get("players", [])
@@ -713,6 +845,9 @@ elif st.session_state.game_state == "sync_lobby":
         # Перевірка, чи я хост
         is_host = (data.get("host") == my_name)
 
+        # Хто онлайн — для сайдбару (сітку гравців оновлює фрагмент lobby_live)
+        online_players = room_store.online(st.session_state.room_id, current_players)
+
         # --- СПОВІЩЕННЯ ПРО ВХІД / ВИХІД ГРАВЦІВ ---
         # Якщо це перший рендер — запамʼятовуємо поточний список
         if "old_players" not in st.session_state:
@@ -744,13 +879,19 @@ elif st.session_state.game_state == "sync_lobby":
             # Список гравців
             st.write("👥 Гравці:")
             for p in current_players:
-                st.caption(f"• {p} {'(Хост)' if p == data.get('host') else ''}")
+                st.caption(f"• {p} {'(Хост)' if p == data.get('host') else ''}"
+                           f"{'' if p in online_players else ' 💤 офлайн'}")
 
             # Кнопка виходу з гри
             if st.button("🔴 ВИЙТИ З ГРИ", key="exit_btn"):
-                # Видаляємо себе зі списку гравців
-                updated_players = [p for p in current_players if p != my_name]
-                ref.update({"players": updated_players})
+                # Видаляємо себе зі списку гравців (ArrayRemove — чужі входи не затираємо).
+                # База не відповіла — все одно йдемо: без heartbeat-ів нас і так позначать офлайн
+                writes.remove_player(my_name)
+                try:
+                    writes.commit()
+                except StoreUnavailable:
+                    pass
+                room_store.leave(st.session_state.room_id, my_name)
 
                 # Чистимо room_id
                 del st.session_state.room_id
@@ -759,34 +900,23 @@ elif st.session_state.game_state == "sync_lobby":
                 st.session_state.game_state = "mode_select"
                 st.rerun()
 
-    # ⚠️ Логічна помилка: цей elif ніколи не виконається,
-    # бо перевіряє те саме, що й if вище
-    elif doc.exists:
+    # Кімнату видалили (або її не було) — назад у налаштування
+    else:
         st.error("Кімнату не знайдено!")
         st.session_state.game_state = "setup"
         st.rerun()
 
-    # Повторно дістаємо дані кімнати
-    data = doc.to_dict()
-
     # Якщо хост уже запустив гру — всі переходять у playing_sync
-    if data.get("state") == "playing":
+    if room_state.phase(data) != room_state.LOBBY:
         st.session_state.game_state = "playing_sync"
         st.rerun()
 
     # --- ОСНОВНИЙ ЕКРАН ЛОББІ ---
-    st.write("### Гравці в лобі:")
-
-    # Відображення гравців у 3 колонки
-    cols = st.columns(3)
-    for i, p in enumerate(data["players"]):
-        cols[i % 3].button(f"👤 {p}", disabled=True, key=f"p_{i}")
+    # Гравці (і налаштування для не-хостів) оновлюються самі, без rerun усього екрана
+    lobby_live(st.session_state.room_id, my_name, is_host)
 
     st.divider()
 
-    # Повторна перевірка, чи я хост
-    is_host = (data.get("host") == st.session_state.my_name)
-
     if is_host:
         # Налаштування для хоста
         st.subheader("👑 Ви Хост (Адмін)")
@@ -806,63 +936,87 @@ elif st.session_state.game_state == "sync_lobby":
             data.get("duration", 60)
         )
 
-        # Якщо значення змінилися — оновлюємо базу
-        if h_rounds != data.get("total_rounds") or h_timer != data.get("duration"):
-            ref.update({"total_rounds": h_rounds, "duration": h_timer})
+        # Запишеться лише те, що справді змінилось (і разом з рештою записів цього rerun)
+        writes.set("total_rounds", h_rounds)
+        writes.set("duration", h_timer)
 
         # Кнопка старту гри
         if st.button("ПОЧАТИ ГРУ ДЛЯ ВСІХ 🔥"):
-            ref.update({
-                "state": "playing",
-                "current_round": 1,
-                "explainer": "",
-                "listener": ""
-            })
+            updates = room_state.start_game(data)
+            if updates is not None:
+                for field, value in updates.items():
+                    writes.set(field, value)
+                writes.increment("version")   # новий стан кімнати
+                try:
+                    writes.commit()
+                except StoreUnavailable:
+                    st.error(DB_DOWN_MSG)
+                    st.stop()
             st.rerun()
-    else:
-        # Повідомлення для не-хостів
-        st.warning("🕒 Очікуємо, поки хост розбереться в кнопках...")
-        st.info(f"📊 Раундів: {data.get('total_rounds', 3)} | ⏱ Час: {data.get('duration', 60)}с")
 
     # Кнопка виходу з кімнати (дублюється поза сайдбаром)
     if st.button("🚪 ПОКИНУТИ КІМНАТУ"):
-        updated_players = [p for p in current_players if p != my_name]
-        ref.update({"players": updated_players})
+        writes.remove_player(my_name)
+        try:
+            writes.commit()
+        except StoreUnavailable:
+            pass
+        room_store.leave(st.session_state.room_id, my_name)
         del st.session_state.room_id
         st.session_state.game_state = "mode_select"
         st.rerun()
 
-    # Автооновлення лоббі
-    time.sleep(2)
-    st.rerun()
+    # Скидаємо в базу те, що назбиралось за rerun (нема змін — нема запису).
+    # Не вийшло — налаштування хоста лишаються у віджетах і запишуться наступним rerun
+    try:
+        writes.commit()
+    except StoreUnavailable:
+        st.warning(DB_DOWN_MSG)
 elif st.session_state.game_state == "playing_sync":
     # Гра в синхронному режимі, тут обробляємо активний хід та очікування
 
-    # 1. Отримуємо свіжі дані з бази Firestore
-    ref = db.collection("rooms").document(st.session_state.room_id)  # посилання на документ кімнати
-    doc = ref.get()  # отримуємо дані з бази
+    # 1. Беремо свіжий стан кімнати з підписки (Firestore сам пушить зміни) — одне читання на rerun
+    rerun_timer.phase("room")
+    room_sub = room_store.subscribe(st.session_state.room_id)  # один слухач на кімнату на весь сервер
+    data, room_version = room_sub.get()  # останній стан + його версія
+    rerun_timer.phase("screen")
 
-    if not doc.exists:
+    if data is None:
         # Якщо документа нема (кімната видалена/не створена), повертаємо в головне меню
         st.session_state.game_state = "mode_select"
         st.rerun()
 
-    data = doc.to_dict()  # конвертуємо дані документа у словник
     total_rounds = data.get("total_rounds", 3)  # загальна кількість раундів
     current_round = data.get("current_round", 1)  # поточний раунд
     my_name = st.session_state.my_name  # ім'я гравця
     is_host = (data.get("host") == my_name)  # перевірка, чи ми хост
+    state_version = data.get("version", 0)  # версія стану, яку ми бачили (умова для транзакцій)
+    phase = room_state.phase(data)  # в якому стані кімната (див. room_state.py)
+    room_store.heartbeat(st.session_state.room_id, my_name)  # ми ще тут (не частіше ніж раз на 15 с)
+
+    # пояснювач дописує в базу результати, які ще не встиг скинути — хоч би в якому стані кімната:
+    # хід міг закрити хост раніше, ніж ми самі побачили кінець таймера
+    retry_at = None  # коли повторити запис, що не пройшов (див. room_watch)
+    closer = None    # хто закриває хід, якщо час вийшов
+    if not flush_turn(st.session_state.room_id, my_name):
+        st.warning(DB_DOWN_MSG)
+        retry_at = time.time() + DB_RETRY_SEC
 
     # 2. Перевірка на фінал гри
-    if current_round > total_rounds:
+    if phase == room_state.FINISHED:
         st.session_state.scores = data.get("scores", {})  # зберігаємо фінальні бали
         st.session_state.game_state = "finished"  # стан гри — завершено
         st.rerun()  # перезавантаження сторінки
 
+    # гру ще не запустили (або кімнату повернули в лобі)
+    if phase == room_state.LOBBY:
+        st.session_state.game_state = "sync_lobby"
+        st.rerun()
+
     # ----------------------------
     # Стан 1: Очікування початку ходу
     # ----------------------------
-    if not data.get("explainer"):  # якщо ще не обрано пояснювача
+    if phase == room_state.TURN_PENDING:  # якщо ще не обрано пояснювача
         st.title(f"Раунд {current_round} з {total_rounds}")  # заголовок раунду
 
         # масив "заповнювачів" та жартівливих підказок для гравців
@@ -873,77 +1027,68 @@ elif st.session_state.game_state == "playing_sync":
             "😁 Ми теж не знаємо що таке Барбадос."
         ]
 
-        st.info(random.choice(quotes))  # виводимо випадкову підказку/жарт
+        # одна підказка на раунд, а не нова на кожен rerun
+        if st.session_state.get("quote_round") != current_round:
+            st.session_state.current_quote = random.choice(quotes)
+            st.session_state.quote_round = current_round
+        st.info(st.session_state.current_quote)  # виводимо підказку/жарт
 
         if is_host:  # якщо ми хост
             if st.button("ПОЧАТИ ХІД 🎲", use_container_width=True):
-                current_players = data.get("players", [])  # список гравців
+                # тільки ті, хто онлайн: закриті вкладки не можуть пояснювати чи слухати
+                current_players = room_store.online(st.session_state.room_id, data.get("players", []))
                 if len(current_players) >= 2:  # мінімум 2 гравці для ходу
                     p1, p2 = random.sample(current_players, 2)  # випадково обираємо пару
                     print(f"[GAME] Host picked: {p1} explaining to {p2}")  # лог в консоль
-                    ref.update({
-                        "explainer": p1,  # пояснювач
-                        "listener": p2,   # той, хто відгадує
-                        "word": random.choice(st.session_state.all_words),  # випадкове слово
-                        "t_end": time.time() + data.get("duration", 60)  # кінець таймера
-                    })
-                    st.rerun()  # перезавантаження сторінки
+                    # транзакція: хід стартує, лише якщо стан кімнати не змінився з нашого снапшота.
+                    # Пачка слів з колоди кімнати йде в таємний документ пояснювача (слухач її не бачить)
+                    try:
+                        room_store.start_turn(
+                            st.session_state.room_id, state_version,
+                            explainer=p1,  # пояснювач
+                            listener=p2,   # той, хто відгадує
+                            deal=lambda deck: draw_words(word_store, deck, BATCH_SIZE),  # слова без повторів
+                            t_end=time.time() + data.get("duration", 60)  # кінець таймера
+                        )
+                        st.rerun()  # перезавантаження сторінки
+                    except StoreUnavailable:
+                        st.error(DB_DOWN_MSG)  # хід не стартував — хост натисне ще раз
                 else:
-                    st.error("Для гри потрібно мінімум 2 гравці!")  # помилка, якщо мало гравців
+                    st.error("Для гри потрібно мінімум 2 гравці онлайн!")  # помилка, якщо мало гравців
         else:
             # якщо ми не хост — чекаємо, поки хост запустить хід
             st.warning("⏳ Очікуємо, поки хост запустить наступний хід...")
-            time.sleep(2)
-            st.rerun()
 
     # ----------------------------
-    # Стан 2: Активний хід (таймер та слова)
+    # Стан 2: Активний хід (таймер та слова) / час вийшов
     # ----------------------------
-    else:  # якщо вже обрано пояснювача
-        rem = int(data["t_end"] - time.time())  # залишок часу
-
-        if rem <= 0:  # якщо час вийшов
-            ref.update({
-                "explainer": "",  # скидаємо пояснювача
-                "listener": ""    # скидаємо слухача
-            })
+    else:  # TURN_ACTIVE або TURN_OVER
+        # таймер тікає в браузері (без rerun щосекунди); True — коли час вийшов
+        time_up = countdown(data["t_end"], key="sync_timer") or phase == room_state.TURN_OVER
+
+        if time_up:  # якщо час вийшов
             st.warning("⏰ Час вийшов!")  # повідомлення про кінець таймера
 
-            if is_host:  # хост може переключити хід
-                if st.button("НАСТУПНИЙ ХІД ➡️", use_container_width=True):
-                    ref.update({
-                        "word": "",  # скидаємо слово
-                        "current_round": current_round + 1 if is_host else current_round  # наступний раунд
-                    })
-                    st.rerun()
+            # хід закриває один гравець на кімнату — хост (або, якщо він офлайн, перший онлайн-гравець):
+            # скидає пояснювача/слухача і переключає раунд однією транзакцією
+            online_players = room_store.online(st.session_state.room_id, data.get("players", []))
+            closer = room_state.turn_authority(data.get("host"), online_players)
+            if my_name == closer:
+                try:
+                    room_store.end_turn(st.session_state.room_id, state_version)
+                except StoreUnavailable:
+                    st.warning(DB_DOWN_MSG)
+                    retry_at = time.time() + DB_RETRY_SEC
             else:
-                # інші гравці чекають на хост
+                # інші гравці просто чекають, поки зміна прилетить у підписку
                 st.info("🕒 Очікуємо, поки хост переключить раунд...")
-                time.sleep(2)
-                st.rerun()
         else:
-            # якщо час ще є
-            st.subheader(f"⏱ Залишилось: {rem} сек")  # показуємо таймер
+            # якщо час ще є (таймер уже намальований вище)
             st.write(f"🎤 Пояснює: **{data['explainer']}** ➜ Слухає: **{data['listener']}**")  # хто пояснює, хто слухає
 
             if my_name == data["explainer"]:  # якщо ми пояснювач
                 st.success("ТВОЯ ЧЕРГА ПОЯСНЮВАТИ!")
-                st.markdown(f'<div class="word-box">{data["word"].upper()}</div>', unsafe_allow_html=True)  # показ слова
-
-                c1, c2 = st.columns(2)  # дві кнопки: вгадано / пропустити
-                if c1.button("✅ ВГАДАНО", use_container_width=True):
-                    # оновлюємо бали в базі
-                    new_scores = data.get("scores", {})
-                    new_scores[my_name] = new_scores.get(my_name, 0) + 1
-                    ref.update({
-                        "scores": new_scores,
-                        "word": random.choice(st.session_state.all_words)  # нове слово
-                    })
-                    st.rerun()
-
-                if c2.button("❌ ПРОПУСТИТИ", use_container_width=True):
-                    ref.update({"word": random.choice(st.session_state.all_words)})  # нове слово
-                    st.rerun()
+                explainer_panel(st.session_state.room_id, my_name, data["t_end"])
 
             elif my_name == data["listener"]:  # якщо ми слухач
                 st.warning("ТИ ВІДГАДУЄШ!")
@@ -954,8 +1099,10 @@ elif st.session_state.game_state == "playing_sync":
                 st.markdown(f'<div class="word-box" style="font-size: 24px;">{data["explainer"]} пояснює...</div>',
                             unsafe_allow_html=True)
 
-            time.sleep(1)  # пауза 1 секунда перед оновленням
-            st.rerun()  # постійне оновлення сторінки для синхронності
+
+    # рахунок оновлюється сам; екран цілком перемальовуємо лише коли змінилась кімната
+    scoreboard(st.session_state.room_id)
+    room_watch(st.session_state.room_id, my_name, room_version, retry_at, closer)
 # --- IRL РЕЖИМ ---  (гра в реальному житті, локально, без синхронізації через базу)
 elif st.session_state.game_state == "playing_irl":
 
@@ -974,16 +1121,21 @@ elif st.session_state.game_state == "playing_irl":
         if st.button("Я ГОТОВИЙ! ▶️"):  # кнопка гравця, що він готовий почати
             st.session_state.turn_active = True  # встановлюємо стан ходу як активний
             st.session_state.start_time = time.time()  # записуємо час старту ходу
-            st.session_state.current_word = random.choice(st.session_state.all_words);  # обираємо слово для пояснення
+            st.session_state.current_word, st.session_state.deck = draw_word(
+                word_store, st.session_state.get("deck"))  # обираємо слово для пояснення (з колоди, без повторів)
             st.rerun()  # перезавантаження сторінки для старту ходу
 
     # Якщо хід активний
     else:
-        # залишок часу для поточного ходу
-        rem = int(st.session_state.duration - (time.time() - st.session_state.start_time))
+        # Вивід таймера і активного гравця (цифри тікають у браузері, сервер чекає лише на кінець часу)
+        time_up = countdown(
+            st.session_state.start_time + st.session_state.duration,
+            f"⏱ {{sec}} сек | {active}",
+            key="irl_timer"
+        )
 
         # якщо час вийшов
-        if rem <= 0:
+        if time_up:
             st.session_state.turn_active = False  # хід закінчився
             # переходимо до наступного гравця (циклічно)
             st.session_state.current_player_idx = (st.session_state.current_player_idx + 1) % len(
@@ -992,8 +1144,6 @@ elif st.session_state.game_state == "playing_irl":
             if st.session_state.current_player_idx == 0: st.session_state.current_round += 1
             st.rerun()  # перезавантаження сторінки для нового ходу або нового раунду
 
-        # Вивід таймера і активного гравця
-        st.subheader(f"⏱ {rem} сек | {active}")
         # Показуємо слово, яке треба пояснити
         st.markdown(f'<div class="word-box">{st.session_state.current_word.upper()}</div>', unsafe_allow_html=True)
 
@@ -1001,16 +1151,15 @@ elif st.session_state.game_state == "playing_irl":
         c1, c2 = st.columns(2)
         if c1.button("✅ ВГАДАНО"):
             st.session_state.scores[active] += 1;  # додаємо бал активному гравцю
-            st.session_state.current_word = random.choice(st.session_state.all_words);  # нове слово
+            st.session_state.current_word, st.session_state.deck = draw_word(
+                word_store, st.session_state.deck)  # нове слово
             st.rerun()  # перезавантаження сторінки
 
         if c2.button("❌ СКІП"):
-            st.session_state.current_word = random.choice(st.session_state.all_words);  # нове слово без балів
+            st.session_state.current_word, st.session_state.deck = draw_word(
+                word_store, st.session_state.deck)  # нове слово без балів
             st.rerun()
 
-        time.sleep(0.1);  # невелика пауза, щоб уникнути "зависаючих" оновлень
-        st.rerun()  # постійне оновлення сторінки для таймера
-
 # --- ФІНАЛ ---  (коли гра завершена)
 elif st.session_state.game_state == "finished":
     st.balloons();  # веселий ефект
@@ -1025,268 +1174,5 @@ elif st.session_state.game_state == "finished":
         st.rerun()  # перезавантаження сторінки
 
 
-
-
-#фікс нового багу з раундами і вильотом
-        
-elif st.session_state.game_state == "playing_sync":  # Перевіряємо, чи ми зараз в синхронній онлайн грі
-    # 1. Отримуємо свіжі дані з бази
-    ref = db.collection("rooms").document(st.session_state.room_id)  # Створюємо посилання на документ кімнати в Firestore
-    doc = ref.get()  # Отримуємо актуальні дані з бази
-    if not doc.exists:  # Якщо документа не існує
-        st.session_state.game_state = "mode_select"  # Повертаємо користувача в головне меню
-        st.rerun()  # Перезапускаємо Streamlit для оновлення UI
-
-    data = doc.to_dict()  # Перетворюємо дані документа у словник Python
-    total_rounds = data.get("total_rounds", 3)  # Загальна кількість раундів, дефолт 3
-    current_round = data.get("current_round", 1)  # Поточний раунд, дефолт 1
-    my_name = st.session_state.my_name  # Ім'я поточного гравця
-    is_host = (data.get("host") == my_name)  # Перевірка, чи я хост
-
-    # Перевірка на фінал гри
-    if current_round > total_rounds:  # Якщо поточний раунд більше загальної кількості
-        st.session_state.scores = data.get("scores", {})  # Записуємо фінальні бали
-        st.session_state.game_state = "finished"  # Перемикаємо стан гри на "фініш"
-        st.rerun()  # Оновлюємо UI
-
-    # --- Стан 1: Очікування початку ходу (вибір пари) ---
-    if not data.get("explainer"):  # Якщо ще немає активного пояснювача
-        st.title(f"Раунд {current_round} з {total_rounds}")  # Виводимо номер раунду
-
-        # Обираємо рандомний quote лише один раз для цього раунду
-        if "current_quote" not in st.session_state:  # Перевіряємо, чи вже є quote
-            st.session_state.current_quote = random.choice(st.session_state.quotes)  # Вибираємо випадковий
-        st.info(st.session_state.current_quote)  # Показуємо обраний quote
-
-        if is_host:  # Якщо я хост
-            if st.button("ПОЧАТИ ХІД 🎲", use_container_width=True):  # Кнопка запуску ходу
-                current_players = data.get("players", [])  # Отримуємо список гравців
-                if len(current_players) >= 2:  # Перевірка на мінімум 2 гравців
-                    p1, p2 = random.sample(current_players, 2)  # Випадково обираємо пояснювача і слухача
-                    ref.update({  # Оновлюємо документ у базі
-                        "explainer": p1,  # Хто пояснює
-                        "listener": p2,  # Хто слухає
-                        "word": random.choice(st.session_state.all_words),  # Слово для пояснення
-                        "t_end": time.time() + data.get("duration", 60)  # Кінець ходу через duration секунд
-                    })
-                    time.sleep(0.05)  # Коротка пауза для синхронізації з базою
-                    st.rerun()  # Оновлюємо UI
-                else:
-                    st.error("Для гри потрібно мінімум 2 гравці!")  # Виводимо помилку
-        else:
-            st.warning("⏳ Очікуємо, поки хост запустить наступний хід...")  # Якщо не хост, чекаємо
-            time.sleep(0.5)  # Коротка пауза
-            st.rerun()  # Оновлюємо UI
-
-    # --- Стан 2: Активний хід (таймер і слова) ---
-    else:
-        # Підтягуємо свіжі дані перед відображенням
-        doc = ref.get()  # Беремо останні дані з бази
-        data = doc.to_dict()  # Конвертуємо в словник
-        current_round = data.get("current_round", 1)  # Підтягуємо актуальний номер раунду
-
-        rem = int(data["t_end"] - time.time())  # Обчислюємо залишок часу
-        if rem <= 0:  # Якщо час вийшов
-            # Знімаємо активного гравця і збільшуємо раунд, якщо хост
-            updates = {"explainer": "", "listener": ""}  # Очищаємо пояснювача і слухача
-            if is_host:
-                updates["current_round"] = current_round + 1  # Хост збільшує раунд
-            ref.update(updates)  # Оновлюємо документ у базі
-            st.session_state.current_quote = None  # Обнуляємо quote для нового раунду
-            time.sleep(0.05)  # Невелика пауза
-            st.rerun()  # Перезапуск UI
-        else:
-            st.subheader(f"⏱ Залишилось: {rem} сек | Раунд {current_round}")  # Показуємо таймер і раунд
-            st.write(f"🎤 Пояснює: **{data['explainer']}** ➜ Слухає: **{data['listener']}**")  # Інформація про хід
-
-            if my_name == data["explainer"]:  # Якщо я пояснювач
-                st.success("ТВОЯ ЧЕРГА ПОЯСНЮВАТИ!")  # Виводимо повідомлення
-                st.markdown(f'<div class="word-box">{data["word"].upper()}</div>', unsafe_allow_html=True)  # Слово для пояснення
-
-                c1, c2 = st.columns(2)  # Розділяємо кнопку на дві колонки
-                if c1.button("✅ ВГАДАНО", use_container_width=True):  # Кнопка вгадано
-                    new_scores = data.get("scores", {})  # Беремо поточні бали
-                    new_scores[my_name] = new_scores.get(my_name, 0) + 1  # Додаємо 1 бал
-                    ref.update({  # Оновлюємо базу
-                        "scores": new_scores,
-                        "word": random.choice(st.session_state.all_words)  # Нове слово
-                    })
-                    time.sleep(0.05)  # Пауза для синхронізації
-                    st.rerun()  # Перезапуск UI
-
-                if c2.button("❌ ПРОПУСТИТИ", use_container_width=True):  # Кнопка пропустити
-                    ref.update({"word": random.choice(st.session_state.all_words)})  # Нове слово
-                    time.sleep(0.05)
-                    st.rerun()
-
-            elif my_name == data["listener"]:  # Якщо я слухач
-                st.warning("ТИ ВІДГАДУЄШ!")  # Повідомлення
-                st.markdown('<div class="word-box">???</div>', unsafe_allow_html=True)  # Слово приховано
-
-            else:  # Якщо я спостерігач
-                st.info("Спостерігайте за грою інших...")  # Повідомлення
-                st.markdown(f'<div class="word-box" style="font-size: 24px;">{data["explainer"]} пояснює...</div>',
-                            unsafe_allow_html=True)  # Відображаємо, хто пояснює
-
-            time.sleep(0.1)  # Коротка пауза перед повторним rerun
-            st.rerun()  # Перезапуск UI для оновлення таймера та стану
-
-
-
-
-#фікс квот можливо
-# --- Стан 1: Очікування початку ходу (вибір пари) ---
-if not data.get("explainer"):  # Якщо ще немає активного пояснювача
-    st.title(f"Раунд {current_round} з {total_rounds}")  # Виводимо номер раунду
-
-    # --- Вибір рандомного quote ---
-    # Ми хочемо, щоб кожен раунд показував **один quote**, а не мінявся кожну секунду
-    if "current_quote" not in st.session_state:  # Перевіряємо, чи вже обраний quote для цього раунду
-        st.session_state.current_quote = random.choice(st.session_state.quotes)  
-        # Якщо ще немає, вибираємо випадковий і зберігаємо в session_state,
-        # щоб він залишався постійним для всіх учасників і не змінювався при rerun
-
-    st.info(st.session_state.current_quote)  # Відображаємо обраний quote на екрані
-
-    # --- Кнопка старту ходу для хоста ---
-    if is_host:  
-        if st.button("ПОЧАТИ ХІД 🎲", use_container_width=True):  # Якщо хост натискає кнопку
-            current_players = data.get("players", [])  # Беремо список гравців
-            if len(current_players) >= 2:  # Перевірка на мінімум 2 гравців
-                p1, p2 = random.sample(current_players, 2)  # Випадковий пояснювач і слухач
-                ref.update({  # Оновлюємо базу
-                    "explainer": p1,
-                    "listener": p2,
-                    "word": random.choice(st.session_state.all_words),
-                    "t_end": time.time() + data.get("duration", 60)
-                })
-                time.sleep(0.05)  # Невелика пауза для синхронізації
-                st.rerun()  # Оновлюємо UI
-            else:
-                st.error("Для гри потрібно мінімум 2 гравці!")  # Повідомлення про помилку
-    else:
-        st.warning("⏳ Очікуємо, поки хост запустить наступний хід...")  # Якщо не хост, чекаємо
-        time.sleep(0.5)  # Коротка пауза для стабільності
-        st.rerun()  # Оновлення UI
-
-
-
-#фікс екранів раунду квот виліт гравця МОЖЛИВИЙ все разом
-elif st.session_state.game_state == "playing_sync":
-    # --- Отримуємо свіжі дані з бази ---
-    ref = db.collection("rooms").document(st.session_state.room_id)
-    doc = ref.get()
-    if not doc.exists:
-        # Якщо кімнати не існує — повертаємося в меню вибору режиму
-        st.session_state.game_state = "mode_select"
-        st.rerun()
-
-    data = doc.to_dict()
-    total_rounds = data.get("total_rounds", 3)
-    current_round = data.get("current_round", 1)  # номер поточного раунду
-    my_name = st.session_state.my_name
-    is_host = (data.get("host") == my_name)
-
-    # --- Перевірка на фінал гри ---
-    if current_round > total_rounds:
-        st.session_state.scores = data.get("scores", {})
-        st.session_state.game_state = "finished"
-        st.rerun()
-
-    # --- Стан 1: Очікування початку ходу (вибір пари) ---
-    if not data.get("explainer"):
-        st.title(f"Раунд {current_round} з {total_rounds}")
-
-        # --- Вибір статичного quote, прив'язка до раунду ---
-        if ("current_quote" not in st.session_state or
-            st.session_state.get("quote_round", 0) != current_round):
-            st.session_state.current_quote = random.choice(st.session_state.quotes)
-            st.session_state.quote_round = current_round
-        st.info(st.session_state.current_quote)
-
-        if is_host:
-            if st.button("ПОЧАТИ ХІД 🎲", use_container_width=True):
-                current_players = data.get("players", [])
-                if len(current_players) >= 2:
-                    # Рандомно обираємо двох гравців для пояснення/відгадування
-                    p1, p2 = random.sample(current_players, 2)
-                    ref.update({
-                        "explainer": p1,
-                        "listener": p2,
-                        "word": random.choice(st.session_state.all_words),
-                        "t_end": time.time() + data.get("duration", 60)
-                    })
-                    # Маленька пауза, щоб база оновилася перед rerun
-                    time.sleep(0.05)
-                    st.rerun()
-                else:
-                    st.error("Для гри потрібно мінімум 2 гравці!")
-        else:
-            st.warning("⏳ Очікуємо, поки хост запустить наступний хід...")
-            time.sleep(0.5)
-            st.rerun()
-
-    # --- Стан 2: Активний хід (таймер і слова) ---
-    else:
-        # Завжди підтягуємо свіжі дані перед відображенням
-        doc = ref.get()
-        data = doc.to_dict()
-        current_round = data.get("current_round", 1)
-
-        rem = int(data["t_end"] - time.time())
-        if rem <= 0:
-            # Знімаємо активного гравця і збільшуємо раунд, якщо хост
-            updates = {"explainer": "", "listener": ""}
-            if is_host:
-                updates["current_round"] = current_round + 1
-            ref.update(updates)
-
-            # Обнуляємо quote для наступного раунду
-            st.session_state.current_quote = None
-            st.session_state.quote_round = 0
-            # Маленька пауза для оновлення
-            time.sleep(0.05)
-            st.rerun()
-        else:
-            # Відображаємо таймер та поточний раунд
-            st.subheader(f"⏱ Залишилось: {rem} сек | Раунд {current_round}")
-            st.write(f"🎤 Пояснює: **{data['explainer']}** ➜ Слухає: **{data['listener']}**")
-
-            # --- Дії для пояснювача ---
-            if my_name == data["explainer"]:
-                st.success("ТВОЯ ЧЕРГА ПОЯСНЮВАТИ!")
-                st.markdown(f'<div class="word-box">{data["word"].upper()}</div>', unsafe_allow_html=True)
-
-                c1, c2 = st.columns(2)
-                if c1.button("✅ ВГАДАНО", use_container_width=True):
-                    # Оновлюємо бали в базі
-                    new_scores = data.get("scores", {})
-                    new_scores[my_name] = new_scores.get(my_name, 0) + 1
-                    ref.update({
-                        "scores": new_scores,
-                        "word": random.choice(st.session_state.all_words)
-                    })
-                    time.sleep(0.05)
-                    st.rerun()
-
-                if c2.button("❌ ПРОПУСТИТИ", use_container_width=True):
-                    ref.update({"word": random.choice(st.session_state.all_words)})
-                    time.sleep(0.05)
-                    st.rerun()
-
-            # --- Дії для відгадувача ---
-            elif my_name == data["listener"]:
-                st.warning("ТИ ВІДГАДУЄШ!")
-                st.markdown('<div class="word-box">???</div>', unsafe_allow_html=True)
-
-            # --- Дії для спостерігачів ---
-            else:
-                st.info("Спостерігайте за грою інших...")
-                st.markdown(
-                    f'<div class="word-box" style="font-size: 24px;">{data["explainer"]} пояснює...</div>',
-                    unsafe_allow_html=True
-                )
-
-            # Коротка пауза, щоб уникнути "викиду" і проблем з ререндером
-            time.sleep(0.1)
-            st.rerun()
+# Скрипт дійшов до кінця без st.rerun() — закриваємо останню фазу
+rerun_timer.finish()